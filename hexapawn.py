@@ -1,24 +1,118 @@
 # hexapawn.py
-# move generator : line 142 - 278
-# board evaluator : line 283 - 348
-# minimax search : line 21 -139
+# move generator : line 647 - 931
+# board evaluator : line 934 - 1032
+# minimax search : line 115 - 328
+# alpha-beta search : line 331 - 644
+
+import time
+from itertools import chain
+
+import hexapawn_batch as hexapawn_batch_search
+import hexapawn_bitboard
+import hexapawn_compact
+import hexapawn_incremental
+import hexapawn_parallel
+import hexapawn_symmetry
+import hexapawn_tablebase
+import hexapawn_vectorized
+
+STATISTICS_MODES = ("bitboard", "minimax", "alphabeta")  # the search modes that fill in a SearchStatistics
+
+def hexapawn(cur_board, board_size, pawn_color, number_moves_ahead, search_mode="bitboard", transposition_table=None,
+             workers=None, tablebase=None, statistics=None, position_cache=None):
+    """This is the interface function provided by homework prompt.
 
+    Args:
+        cur_board: The n-element list.
+        board_size: The size of a square board, or a (rows, columns) pair. Boards of any size work, 16x16
+            included; the "bitboard" mode is the one fast enough for large boards.
+        pawn_color: The color indicates which turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        search_mode: "minimax" searches the whole tree, "alphabeta" prunes it with alpha-beta and move ordering,
+            "bitboard" runs the alpha-beta search on integer bitboards, "parallel" splits the bitboard search of the
+            root moves across a process pool, "incremental" makes and unmakes moves on one mutable board,
+            "vectorized" searches whole frontiers at once with NumPy (optional, for wide and shallow searches),
+            "compact" searches interned position objects with the cyclic garbage collector paused. All modes return
+            the same move.
+        transposition_table: An optional hexapawn_transposition.TranspositionTable used by the "bitboard" mode. Pass
+            the same table to every call of one game to reuse the positions searched by the previous moves.
+        workers: The number of worker processes of the "parallel" mode, by default the number of CPUs.
+        tablebase: An optional hexapawn_tablebase.Tablebase. Positions it covers are answered with perfect play
+            instead of a search.
+        statistics: An optional hexapawn_statistics.SearchStatistics the modes of STATISTICS_MODES count their
+            nodes, cache hits, cutoffs and time in. The other modes raise ValueError if given one.
+        position_cache: An optional hexapawn_book.PositionCache, a file of earlier results kept across restarts. It
+            is consulted before searching, and positions missing from it are searched by the bitboard engine and
+            added to it, whatever the search mode.
+    Returns:
+        A list of strings represents the next best move. If no legal next move, it returns the first argument itself.
+    """
+    if statistics is not None and search_mode not in STATISTICS_MODES:
+        raise ValueError("the %s search mode does not fill in statistics" % search_mode)
+
+    if tablebase is not None and number_moves_ahead != 0:
+        tablebase_move = hexapawn_tablebase.tablebase_algorithm(cur_board, board_size, pawn_color, tablebase)
+        if tablebase_move is not None:
+            return tablebase_move
+
+    if position_cache is not None and number_moves_ahead != 0:
+        return position_cache.find_move(cur_board, board_size, pawn_color, number_moves_ahead, transposition_table,
+                                        statistics)
+
+    if search_mode == "bitboard":
+        return hexapawn_bitboard.bitboard_algorithm(cur_board, board_size, pawn_color, number_moves_ahead,
+                                                    transposition_table, statistics)
+    elif search_mode == "parallel":
+        return hexapawn_parallel.parallel_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, workers)
+    elif search_mode == "incremental":
+        return hexapawn_incremental.incremental_algorithm(cur_board, board_size, pawn_color, number_moves_ahead)
+    elif search_mode == "vectorized":
+        return hexapawn_vectorized.vectorized_algorithm(cur_board, board_size, pawn_color, number_moves_ahead)
+    elif search_mode == "compact":
+        return hexapawn_compact.compact_algorithm(cur_board, board_size, pawn_color, number_moves_ahead)
+    elif search_mode == "minimax":
+        return minimax_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, statistics)
+    elif search_mode == "alphabeta":
+        return alpha_beta_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, statistics)
+    else:
+        raise ValueError("unknown search mode: " + str(search_mode))
 
-def hexapawn(cur_board, board_size, pawn_color, number_moves_ahead):
-    """This is the interface function provided by homework prompt.
+
+def hexapawn_batch(requests, workers=None):
+    """This function is the interface for scoring many positions in one call.
+
+    Args:
+        requests: An iterable of (board, board_size, color, depth) tuples, with the same meaning as the arguments of
+            hexapawn().
+        workers: The number of worker processes to spread the batch over, by default the batch runs in this process.
+    Returns:
+        A generator of the next best moves, in request order, each the same list of strings hexapawn() returns.
+    """
+    return hexapawn_batch_search.search_batch(requests, workers)
+
+
+def hexapawn_with_time_budget(cur_board, board_size, pawn_color, time_budget_ms, max_depth=None,
+                              transposition_table=None, statistics=None):
+    """This function picks the next move within a wall-clock time budget instead of a fixed number of moves ahead.
+
+    It searches 1, 2, 3, ... moves ahead and returns the move of the deepest search that completed in time.
 
     Args:
         cur_board: The n-element list.
         board_size: The size of the board.
         pawn_color: The color indicates which turn to move the pawn.
-        number_moves_ahead: The number indicates how many moves to look ahead.
+        time_budget_ms: The time the search may use, in milliseconds.
+        max_depth: The maximum number of moves to look ahead, by default the longest a game can last.
+        transposition_table: An optional hexapawn_transposition.TranspositionTable kept across the calls of a game.
+        statistics: An optional hexapawn_statistics.SearchStatistics, with the time and nodes of every iteration.
     Returns:
         A list of strings represents the next best move. If no legal next move, it returns the first argument itself.
     """
-    return minimax_algorithm(cur_board, board_size, pawn_color, number_moves_ahead)
+    return hexapawn_bitboard.iterative_deepening_algorithm(cur_board, board_size, pawn_color, time_budget_ms,
+                                                           max_depth, transposition_table, statistics)
 
 
-def minimax_algorithm(cur_board, board_size, pawn_color, number_moves_ahead):
+def minimax_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, statistics=None):
     """This function implements the minimax algorithm.
 
     Args:
@@ -26,6 +120,30 @@ def minimax_algorithm(cur_board, board_size, pawn_color, number_moves_ahead):
         board_size: The size of the board.
         pawn_color: The color indicates whose turn to move the pawn.
         number_moves_ahead: The number indicates how many moves to look ahead.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+
+    Returns: A list of string representing the next best move for the current player.
+
+    """
+    if statistics is not None:
+        started_at = time.perf_counter()
+        nodes_before = statistics.nodes
+    best_next_move = search_minimax(cur_board, board_size, pawn_color, number_moves_ahead, statistics)
+    if statistics is not None:
+        statistics.record_iteration(number_moves_ahead, time.perf_counter() - started_at,
+                                    statistics.nodes - nodes_before)
+    return best_next_move
+
+
+def search_minimax(cur_board, board_size, pawn_color, number_moves_ahead, statistics):
+    """This function runs the minimax search of minimax_algorithm.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of the board.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
 
     Returns: A list of string representing the next best move for the current player.
 
@@ -33,11 +151,33 @@ def minimax_algorithm(cur_board, board_size, pawn_color, number_moves_ahead):
     target_color = pawn_color
     next_turn_color = pawn_color
     best_next_move, best_static_board_val = max_value_propagation(cur_board, board_size, target_color,
-                                                                  number_moves_ahead, next_turn_color)
+                                                                  number_moves_ahead, next_turn_color, statistics)
+
+    # the winning moves are searched first, so a move that wins at once may have been picked over an earlier move
+    # in move_generator order that wins too, only later: those earlier moves are checked
+    if number_moves_ahead > 0 and best_next_move is not cur_board and \
+            is_winning_value(best_static_board_val, cur_board):
+        pawn_codes, number_of_white, number_of_black = locate_pawns(cur_board)
+        if winning_moves(cur_board, board_size, pawn_color, number_of_white, number_of_black):
+            if statistics is not None:
+                statistics.move_generator_calls += 1
+            moves = generate_moves(cur_board, board_size, pawn_color, pawn_codes)
+            if hexapawn_symmetry.is_mirror_symmetric(cur_board):
+                moves = hexapawn_symmetry.unique_moves(moves, board_size)
+            following_turn_color = "b" if pawn_color == "w" else "w"
+            for move in moves:
+                new_board = make_move(cur_board, move, pawn_color)
+                if new_board == best_next_move:
+                    break
+                cur_optimal_move, cur_static_board_val = min_value_propagation(
+                    new_board, board_size, target_color, number_moves_ahead - 1, following_turn_color, statistics, 1)
+                if cur_static_board_val == best_static_board_val:
+                    return new_board
     return best_next_move
 
 
-def max_value_propagation(cur_board, board_size, target_color, number_moves_ahead, next_turn_color):
+def max_value_propagation(cur_board, board_size, target_color, number_moves_ahead, next_turn_color, statistics=None,
+                          ply=0):
     """This function is used for max level player to propagate staci board value.
 
     Args:
@@ -46,49 +186,74 @@ def max_value_propagation(cur_board, board_size, target_color, number_moves_ahea
         target_color: A character indicates who is the player given this situation(Max).
         number_moves_ahead: The number indicates how many moves to look ahead.
         next_turn_color: A character indicates which side that needs to generate new nodes and plays the next move.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+        ply: The number of moves played from the root.
 
     Returns:
         The maximum static board value and the best move.
     """
+    if statistics is not None:
+        statistics.nodes_per_ply[ply] += 1
 
     pawn_codes, number_of_white, number_of_black = locate_pawns(cur_board)
 
-    # compute a temporary static value to check if one side wins or not
-    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
-                                                   target_color, next_turn_color)
-
     # check if reach the moves limit
     if number_moves_ahead == 0:  # yes then compute and return an empty list and the static board value
-        return [], cur_board_static_val
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return [], static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black, target_color,
+                                           next_turn_color)
+
+    # generate new nodes lazily, the winning moves first, and let the first one tell if the side can move at all
+    if statistics is not None:
+        statistics.move_generator_calls += 1
+    moves = lazy_move_generator(cur_board, board_size, next_turn_color, pawn_codes, number_of_white, number_of_black)
+    if hexapawn_symmetry.is_mirror_symmetric(cur_board):  # mirrored siblings have the same value
+        moves = list(moves)
+        number_of_moves = len(moves)
+        moves = hexapawn_symmetry.unique_moves(moves, board_size)
+        if statistics is not None:
+            statistics.mirror_duplicates += number_of_moves - len(moves)
+        moves = iter(moves)
+    first_move = next(moves, None)
+
+    # compute a temporary static value to check if one side wins or not
+    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
+                                                   target_color, next_turn_color, first_move is not None)
 
     # check if one side wins
-    if cur_board_static_val == 10 or cur_board_static_val == -10:  # return an empty list and the static board value
+    if abs(cur_board_static_val) == board_win_value(cur_board):  # return an empty list and the static board value
         # if one side wins
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
         return cur_board, cur_board_static_val
 
-    # generate new nodes
-    new_boards = move_generator(cur_board, board_size, next_turn_color, pawn_codes)
     number_moves_ahead -= 1
 
     # switch the turn
     if next_turn_color == "w":
-        next_turn_color = "b"
+        following_turn_color = "b"
     else:
-        next_turn_color = "w"
+        following_turn_color = "w"
 
     # compute the maximum static board value and record the corresponding move
     the_best_move_for_return = cur_board
     max_value_for_return = -2100000000  # set the initial value be a impossible small static board value
-    for new_board in new_boards:
+    for move in chain((first_move,), moves):
+        new_board = make_move(cur_board, move, next_turn_color)
         cur_optimal_move, cur_static_board_val = min_value_propagation(new_board, board_size, target_color,
-                                                                       number_moves_ahead, next_turn_color)
+                                                                       number_moves_ahead, following_turn_color,
+                                                                       statistics, ply + 1)
         if cur_static_board_val > max_value_for_return:
             the_best_move_for_return, max_value_for_return = new_board, cur_static_board_val
+            if is_winning_value(max_value_for_return, cur_board):  # no other move can do better
+                break
 
     return the_best_move_for_return, max_value_for_return
 
 
-def min_value_propagation(cur_board, board_size, target_color, number_moves_ahead, next_turn_color):
+def min_value_propagation(cur_board, board_size, target_color, number_moves_ahead, next_turn_color, statistics=None,
+                          ply=0):
     """This function is used for min level player to propagate staci board value.
 
     Args:
@@ -97,48 +262,388 @@ def min_value_propagation(cur_board, board_size, target_color, number_moves_ahea
         target_color: A character indicates who is the player given this situation(Max).
         number_moves_ahead: The number indicates how many moves to look ahead.
         next_turn_color: A character indicates which side that needs to generate new nodes and plays the next move.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+        ply: The number of moves played from the root.
 
     Returns:
         The minimum static board value and the best move.
     """
+    if statistics is not None:
+        statistics.nodes_per_ply[ply] += 1
 
     pawn_codes, number_of_white, number_of_black = locate_pawns(cur_board)
 
-    # compute a temporary static value to check if one side wins or not
-    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
-                                                   target_color, next_turn_color)
-
     # check if reach the moves limit
     if number_moves_ahead == 0:  # yes then compute and return an empty list and the static board value
-        return [], cur_board_static_val
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return [], static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black, target_color,
+                                           next_turn_color)
+
+    # generate new nodes lazily, the winning moves first, and let the first one tell if the side can move at all
+    if statistics is not None:
+        statistics.move_generator_calls += 1
+    moves = lazy_move_generator(cur_board, board_size, next_turn_color, pawn_codes, number_of_white, number_of_black)
+    if hexapawn_symmetry.is_mirror_symmetric(cur_board):  # mirrored siblings have the same value
+        moves = list(moves)
+        number_of_moves = len(moves)
+        moves = hexapawn_symmetry.unique_moves(moves, board_size)
+        if statistics is not None:
+            statistics.mirror_duplicates += number_of_moves - len(moves)
+        moves = iter(moves)
+    first_move = next(moves, None)
+
+    # compute a temporary static value to check if one side wins or not
+    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
+                                                   target_color, next_turn_color, first_move is not None)
 
     # check if one side wins
-    if cur_board_static_val == 10 or cur_board_static_val == -10:  # return an empty list and the static board value
+    if abs(cur_board_static_val) == board_win_value(cur_board):  # return an empty list and the static board value
         # if one side wins
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
         return cur_board, cur_board_static_val
 
-    # generate new nodes
-    new_boards = move_generator(cur_board, board_size, next_turn_color, pawn_codes)
     number_moves_ahead -= 1
 
     # switch the turn
     if next_turn_color == "w":
-        next_turn_color = "b"
+        following_turn_color = "b"
     else:
-        next_turn_color = "w"
+        following_turn_color = "w"
 
-    # compute the maximum static board value and record the corresponding move
+    # compute the minimum static board value and record the corresponding move
     the_best_move_for_return = cur_board
     min_value_for_return = 2100000000  # set the initial value be a impossible large static board value
-    for new_board in new_boards:
+    for move in chain((first_move,), moves):
+        new_board = make_move(cur_board, move, next_turn_color)
         cur_optimal_move, cur_static_board_val = max_value_propagation(new_board, board_size, target_color,
-                                                                       number_moves_ahead, next_turn_color)
+                                                                       number_moves_ahead, following_turn_color,
+                                                                       statistics, ply + 1)
         if cur_static_board_val < min_value_for_return:
             the_best_move_for_return, min_value_for_return = new_board, cur_static_board_val
+            if is_winning_value(-min_value_for_return, cur_board):  # no other move can do better
+                break
 
     return the_best_move_for_return, min_value_for_return
 
 
+def alpha_beta_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, statistics=None):
+    """This function implements the minimax algorithm with alpha-beta pruning and move ordering.
+
+    The moves are searched in a different order than minimax_algorithm does, so at the root a move only replaces
+    the current best one if it scores higher, or scores the same and comes earlier in move_generator order. This
+    returns exactly the same move as minimax_algorithm.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of the board.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+
+    Returns: A list of string representing the next best move for the current player.
+
+    """
+    if statistics is not None:
+        started_at = time.perf_counter()
+        nodes_before = statistics.nodes
+    best_next_move = search_alpha_beta(cur_board, board_size, pawn_color, number_moves_ahead, statistics)
+    if statistics is not None:
+        statistics.record_iteration(number_moves_ahead, time.perf_counter() - started_at,
+                                    statistics.nodes - nodes_before)
+    return best_next_move
+
+
+def search_alpha_beta(cur_board, board_size, pawn_color, number_moves_ahead, statistics):
+    """This function runs the root of the alpha-beta search of alpha_beta_algorithm.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of the board.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+
+    Returns: A list of string representing the next best move for the current player.
+
+    """
+    target_color = pawn_color
+    search_context = new_search_context(statistics)
+
+    # same early returns as max_value_propagation
+    if number_moves_ahead == 0:
+        return []
+    if statistics is not None:
+        statistics.nodes_per_ply[0] += 1
+        statistics.move_generator_calls += 1
+
+    # one pass over the pawns lists the moves and tells if the side can move at all
+    pawn_codes, number_of_white, number_of_black = locate_pawns(cur_board)
+    moves = generate_moves(cur_board, board_size, pawn_color, pawn_codes)
+    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
+                                                   target_color, pawn_color, len(moves) > 0)
+    if abs(cur_board_static_val) == board_win_value(cur_board):
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return cur_board
+
+    if hexapawn_symmetry.is_mirror_symmetric(cur_board):  # mirrored siblings have the same value
+        number_of_moves = len(moves)
+        moves = hexapawn_symmetry.unique_moves(moves, board_size)
+        if statistics is not None:
+            statistics.mirror_duplicates += number_of_moves - len(moves)
+    original_index_of_move = {move: index for index, move in enumerate(moves)}
+    ordered_moves = order_moves(moves, cur_board, pawn_color, number_of_white, number_of_black, 0, search_context)
+
+    if pawn_color == "w":
+        next_turn_color = "b"
+    else:
+        next_turn_color = "w"
+
+    the_best_move_for_return = cur_board
+    max_value_for_return = -2100000000
+    best_move_index = len(moves)
+    for move in ordered_moves:
+        move_index = original_index_of_move[move]
+        if move_index > best_move_index and is_winning_value(max_value_for_return, cur_board):
+            continue  # a later move cannot beat a win
+        # an earlier move only needs to tie the best value to win, a later move has to beat it
+        if move_index < best_move_index:
+            alpha = max_value_for_return - 1
+        else:
+            alpha = max_value_for_return
+        new_board = make_move(cur_board, move, pawn_color)
+        cur_static_board_val = alpha_beta_min_value(new_board, board_size, target_color, number_moves_ahead - 1,
+                                                    next_turn_color, alpha, 2100000000, 1, search_context)
+        if cur_static_board_val > max_value_for_return or \
+                (cur_static_board_val == max_value_for_return and move_index < best_move_index):
+            the_best_move_for_return, max_value_for_return = new_board, cur_static_board_val
+            best_move_index = move_index
+
+    return the_best_move_for_return
+
+
+def alpha_beta_max_value(cur_board, board_size, target_color, number_moves_ahead, next_turn_color, alpha, beta, ply,
+                         search_context):
+    """This function is used for max level player to propagate static board value with alpha-beta pruning.
+
+    Args:
+        cur_board:  The current board that a list of strings.
+        board_size: The size of the board.
+        target_color: A character indicates who is the player given this situation(Max).
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        next_turn_color: A character indicates which side that needs to generate new nodes and plays the next move.
+        alpha: The value the max player is already guaranteed.
+        beta: The value the min player is already guaranteed.
+        ply: The number of moves played from the root.
+        search_context: The killer moves and history scores shared by the whole search.
+
+    Returns:
+        The maximum static board value. It is exact if it lies between alpha and beta, otherwise it is a bound.
+    """
+    statistics = search_context["statistics"]
+    if statistics is not None:
+        statistics.nodes_per_ply[ply] += 1
+    pawn_codes, number_of_white, number_of_black = locate_pawns(cur_board)
+
+    # check if reach the moves limit
+    if number_moves_ahead == 0:
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black, target_color,
+                                       next_turn_color)
+
+    # one pass over the pawns lists the moves and tells if the side can move at all
+    if statistics is not None:
+        statistics.move_generator_calls += 1
+    moves = generate_moves(cur_board, board_size, next_turn_color, pawn_codes)
+    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
+                                                   target_color, next_turn_color, len(moves) > 0)
+
+    # check if one side wins
+    if abs(cur_board_static_val) == board_win_value(cur_board):
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return cur_board_static_val
+
+    if hexapawn_symmetry.is_mirror_symmetric(cur_board):
+        number_of_moves = len(moves)
+        moves = hexapawn_symmetry.unique_moves(moves, board_size)
+        if statistics is not None:
+            statistics.mirror_duplicates += number_of_moves - len(moves)
+    moves = order_moves(moves, cur_board, next_turn_color, number_of_white, number_of_black, ply, search_context)
+
+    if next_turn_color == "w":
+        following_turn_color = "b"
+    else:
+        following_turn_color = "w"
+
+    max_value_for_return = -2100000000
+    for move in moves:
+        new_board = make_move(cur_board, move, next_turn_color)
+        cur_static_board_val = alpha_beta_min_value(new_board, board_size, target_color, number_moves_ahead - 1,
+                                                    following_turn_color, alpha, beta, ply + 1, search_context)
+        if cur_static_board_val > max_value_for_return:
+            max_value_for_return = cur_static_board_val
+            if max_value_for_return > alpha:
+                alpha = max_value_for_return
+            if alpha >= beta:  # the min player will never allow this node
+                if statistics is not None:
+                    statistics.cutoffs += 1
+                record_cutoff(move, next_turn_color, number_moves_ahead, ply, search_context)
+                break
+            if is_winning_value(max_value_for_return, cur_board):  # no other move can do better
+                break
+
+    return max_value_for_return
+
+
+def alpha_beta_min_value(cur_board, board_size, target_color, number_moves_ahead, next_turn_color, alpha, beta, ply,
+                         search_context):
+    """This function is used for min level player to propagate static board value with alpha-beta pruning.
+
+    Args:
+        cur_board:  The current board that a list of strings.
+        board_size: The size of the board.
+        target_color: A character indicates who is the player given this situation(Max).
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        next_turn_color: A character indicates which side that needs to generate new nodes and plays the next move.
+        alpha: The value the max player is already guaranteed.
+        beta: The value the min player is already guaranteed.
+        ply: The number of moves played from the root.
+        search_context: The killer moves and history scores shared by the whole search.
+
+    Returns:
+        The minimum static board value. It is exact if it lies between alpha and beta, otherwise it is a bound.
+    """
+    statistics = search_context["statistics"]
+    if statistics is not None:
+        statistics.nodes_per_ply[ply] += 1
+    pawn_codes, number_of_white, number_of_black = locate_pawns(cur_board)
+
+    # check if reach the moves limit
+    if number_moves_ahead == 0:
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black, target_color,
+                                       next_turn_color)
+
+    # one pass over the pawns lists the moves and tells if the side can move at all
+    if statistics is not None:
+        statistics.move_generator_calls += 1
+    moves = generate_moves(cur_board, board_size, next_turn_color, pawn_codes)
+    cur_board_static_val = static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black,
+                                                   target_color, next_turn_color, len(moves) > 0)
+
+    # check if one side wins
+    if abs(cur_board_static_val) == board_win_value(cur_board):
+        if statistics is not None:
+            statistics.leaf_evaluations += 1
+        return cur_board_static_val
+
+    if hexapawn_symmetry.is_mirror_symmetric(cur_board):
+        number_of_moves = len(moves)
+        moves = hexapawn_symmetry.unique_moves(moves, board_size)
+        if statistics is not None:
+            statistics.mirror_duplicates += number_of_moves - len(moves)
+    moves = order_moves(moves, cur_board, next_turn_color, number_of_white, number_of_black, ply, search_context)
+
+    if next_turn_color == "w":
+        following_turn_color = "b"
+    else:
+        following_turn_color = "w"
+
+    min_value_for_return = 2100000000
+    for move in moves:
+        new_board = make_move(cur_board, move, next_turn_color)
+        cur_static_board_val = alpha_beta_max_value(new_board, board_size, target_color, number_moves_ahead - 1,
+                                                    following_turn_color, alpha, beta, ply + 1, search_context)
+        if cur_static_board_val < min_value_for_return:
+            min_value_for_return = cur_static_board_val
+            if min_value_for_return < beta:
+                beta = min_value_for_return
+            if alpha >= beta:  # the max player will never allow this node
+                if statistics is not None:
+                    statistics.cutoffs += 1
+                record_cutoff(move, next_turn_color, number_moves_ahead, ply, search_context)
+                break
+            if is_winning_value(-min_value_for_return, cur_board):  # no other move can do better
+                break
+
+    return min_value_for_return
+
+
+def new_search_context(statistics=None):
+    """This function creates the move ordering tables shared by one alpha-beta search.
+
+    Args:
+        statistics: An optional hexapawn_statistics.SearchStatistics the search counts its work in.
+
+    Returns:
+        A dictionary with the killer moves of each ply, the history score of each move and the statistics.
+    """
+    return {"killer_moves": {}, "history_scores": {}, "statistics": statistics}
+
+
+def order_moves(moves, cur_board, whose_turn, number_of_white, number_of_black, ply, search_context):
+    """This function sorts the moves so that the most promising ones are searched first.
+
+    Winning moves (reaching the last row or capturing the last pawn) come first, then captures, then the killer
+    moves of this ply, then the moves with the highest history score. Moves that look equally good keep their
+    move_generator order.
+
+    Args:
+        moves: A list of moves returned by generate_moves.
+        cur_board: The current board that a list of strings.
+        whose_turn: A character indicates which side to move this turn.
+        number_of_white: The total number of white pawns.
+        number_of_black: The total number of black pawns.
+        ply: The number of moves played from the root.
+        search_context: The killer moves and history scores shared by the whole search.
+
+    Returns:
+        A new list with the same moves in search order.
+    """
+    if whose_turn == "w":
+        last_row_idx = len(cur_board) - 1
+        opponent_color = "b"
+        number_of_opponent = number_of_black
+    else:
+        last_row_idx = 0
+        opponent_color = "w"
+        number_of_opponent = number_of_white
+    killer_moves = search_context["killer_moves"].get(ply, ())
+    history_scores = search_context["history_scores"]
+
+    def move_priority(move):
+        is_capture = cur_board[move[2]][move[3]] == opponent_color
+        is_winning = move[2] == last_row_idx or (is_capture and number_of_opponent == 1)
+        return is_winning, is_capture, move in killer_moves, history_scores.get((whose_turn, move), 0)
+
+    return sorted(moves, key=move_priority, reverse=True)
+
+
+def record_cutoff(move, whose_turn, number_moves_ahead, ply, search_context):
+    """This function remembers a move that caused a cutoff so it is tried early in the sibling nodes.
+
+    Args:
+        move: The move that caused the cutoff.
+        whose_turn: A character indicates which side played the move.
+        number_moves_ahead: The number of moves left to look ahead from the node of the cutoff.
+        ply: The number of moves played from the root.
+        search_context: The killer moves and history scores shared by the whole search.
+    """
+    killer_moves = search_context["killer_moves"].setdefault(ply, [])
+    if move not in killer_moves:
+        killer_moves.insert(0, move)
+        del killer_moves[2:]  # keep the two most recent killers
+
+    history_scores = search_context["history_scores"]
+    history_key = (whose_turn, move)
+    history_scores[history_key] = history_scores.get(history_key, 0) + number_moves_ahead * number_moves_ahead
+
+
 def move_generator(cur_board, board_size, whose_turn, pawn_codes):
     """This function generates new valid board(nodes) based on current node.
 
@@ -157,15 +662,14 @@ def move_generator(cur_board, board_size, whose_turn, pawn_codes):
         if pawn_code[0] != whose_turn:
             continue
         else:  # check if the current pawn can move or not
-            cur_row_idx = int(pawn_code[1])
-            cur_col_idx = int(pawn_code[2])
+            cur_row_idx, cur_col_idx = decode_pawn_code(pawn_code)
             cur_row_string = cur_board[cur_row_idx]
             if whose_turn == "w":  # white pawn moves down
                 # check if can move down
                 new_row_idx_down = cur_row_idx + 1
                 new_col_idx_down = cur_col_idx
                 if if_on_the_board(new_row_idx_down, new_col_idx_down, board_size) and cur_board[new_row_idx_down][
-                    new_col_idx_down] == "-":
+                        new_col_idx_down] == "-":
                     cur_row_bottom_string = cur_board[new_row_idx_down]
                     # replace "w" with "-" on the original row
                     new_cur_row_string = cur_row_string[:cur_col_idx] + "-" + cur_row_string[cur_col_idx + 1:]
@@ -280,10 +784,158 @@ def move_generator(cur_board, board_size, whose_turn, pawn_codes):
     return new_board_nodes
 
 
-def static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black, target_color, next_turn_color):
+def generate_moves(cur_board, board_size, whose_turn, pawn_codes):
+    """This function lists the valid moves of the current side without building the new boards.
+
+    The moves come in the same order as the boards built by move_generator.
+
+    Args:
+        cur_board: The current board that a list of strings.
+        board_size: The size of the board.
+        whose_turn: A character indicates which side to move this turn.
+        pawn_codes: A list contains all pawn codes.
+
+    Returns:
+        A list of (from row, from column, to row, to column) tuples.
+    """
+    if whose_turn == "w":  # white pawn moves down
+        row_step = 1
+        opponent_color = "b"
+    else:  # black pawn moves up
+        row_step = -1
+        opponent_color = "w"
+
+    moves = []
+    for pawn_code in pawn_codes:
+        if pawn_code[0] != whose_turn:
+            continue
+        cur_row_idx, cur_col_idx = decode_pawn_code(pawn_code)
+        new_row_idx = cur_row_idx + row_step
+
+        # move straight forward onto an empty square
+        if if_on_the_board(new_row_idx, cur_col_idx, board_size) and cur_board[new_row_idx][cur_col_idx] == "-":
+            moves.append((cur_row_idx, cur_col_idx, new_row_idx, cur_col_idx))
+
+        # move diagonally left and right to eat the opponent pawns if exists
+        for new_col_idx in (cur_col_idx - 1, cur_col_idx + 1):
+            if if_on_the_board(new_row_idx, new_col_idx, board_size) and \
+                    cur_board[new_row_idx][new_col_idx] == opponent_color:
+                moves.append((cur_row_idx, cur_col_idx, new_row_idx, new_col_idx))
+
+    return moves
+
+
+def winning_moves(cur_board, board_size, whose_turn, number_of_white, number_of_black):
+    """This function finds the moves that win the game at once, without going through all the pawns.
+
+    A move wins at once if it reaches the opposite side, which only the pawns one row away can do, or if it
+    captures the last pawn of the opponent, which only the two pawns diagonally behind it can do.
+
+    Args:
+        cur_board: The current board that a list of strings.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        whose_turn: A character indicates which side to move this turn.
+        number_of_white: The total number of white pawns.
+        number_of_black: The total number of black pawns.
+
+    Returns:
+        A list of (from row, from column, to row, to column) tuples, in generator order.
+    """
+    if whose_turn == "w":  # white pawn moves down
+        row_step = 1
+        opponent_color = "b"
+        number_of_opponent = number_of_black
+        goal_row_idx = len(cur_board) - 1
+    else:  # black pawn moves up
+        row_step = -1
+        opponent_color = "w"
+        number_of_opponent = number_of_white
+        goal_row_idx = 0
+    cur_row_idx = goal_row_idx - row_step
+
+    moves = []
+    # the pawns one row away reach the opposite side by moving forward or capturing
+    cur_row_string = cur_board[cur_row_idx]
+    goal_row_string = cur_board[goal_row_idx]
+    cur_col_idx = cur_row_string.find(whose_turn)
+    while cur_col_idx != -1:
+        if goal_row_string[cur_col_idx] == "-":
+            moves.append((cur_row_idx, cur_col_idx, goal_row_idx, cur_col_idx))
+        for new_col_idx in (cur_col_idx - 1, cur_col_idx + 1):
+            if if_on_the_board(goal_row_idx, new_col_idx, board_size) and \
+                    goal_row_string[new_col_idx] == opponent_color:
+                moves.append((cur_row_idx, cur_col_idx, goal_row_idx, new_col_idx))
+        cur_col_idx = cur_row_string.find(whose_turn, cur_col_idx + 1)
+
+    # capturing the last pawn of the opponent, unless it is on the opposite side and already captured above
+    if number_of_opponent == 1:
+        for new_row_idx in range(len(cur_board)):
+            new_col_idx = cur_board[new_row_idx].find(opponent_color)
+            if new_col_idx != -1:
+                break
+        cur_row_idx = new_row_idx - row_step
+        if new_row_idx != goal_row_idx and if_on_the_board(cur_row_idx, 0, board_size):
+            # the pawn on the left captures towards column + 1, it comes first in generator order
+            for cur_col_idx in (new_col_idx - 1, new_col_idx + 1):
+                if if_on_the_board(cur_row_idx, cur_col_idx, board_size) and \
+                        cur_board[cur_row_idx][cur_col_idx] == whose_turn:
+                    moves.append((cur_row_idx, cur_col_idx, new_row_idx, new_col_idx))
+            moves.sort(key=lambda move: (move[0], move[1]))
+    return moves
+
+
+def lazy_move_generator(cur_board, board_size, whose_turn, pawn_codes, number_of_white, number_of_black):
+    """This function yields the valid moves of the current side, the ones that win at once first.
+
+    The winning moves come in generator order, then the other moves in generator order. Nothing more is generated
+    when the search stops after a win, and the first move yielded tells if the side can move at all, so the search
+    does not need if_can_move.
+
+    Args:
+        cur_board: The current board that a list of strings.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        whose_turn: A character indicates which side to move this turn.
+        pawn_codes: A list contains all pawn codes.
+        number_of_white: The total number of white pawns.
+        number_of_black: The total number of black pawns.
+
+    Yields:
+        (from row, from column, to row, to column) tuples.
+    """
+    first_moves = winning_moves(cur_board, board_size, whose_turn, number_of_white, number_of_black)
+    yield from first_moves
+    for move in generate_moves(cur_board, board_size, whose_turn, pawn_codes):
+        if move not in first_moves:
+            yield move
+
+
+def make_move(cur_board, move, whose_turn):
+    """This function builds the board reached by playing one move.
+
+    Args:
+        cur_board: The current board that a list of strings.
+        move: A (from row, from column, to row, to column) tuple returned by generate_moves.
+        whose_turn: A character indicates which side plays the move.
+
+    Returns:
+        A new list of strings, the current board is left unchanged.
+    """
+    cur_row_idx, cur_col_idx, new_row_idx, new_col_idx = move
+    new_node = cur_board.copy()
+
+    cur_row_string = new_node[cur_row_idx]
+    new_node[cur_row_idx] = cur_row_string[:cur_col_idx] + "-" + cur_row_string[cur_col_idx + 1:]
+
+    new_row_string = new_node[new_row_idx]
+    new_node[new_row_idx] = new_row_string[:new_col_idx] + whose_turn + new_row_string[new_col_idx + 1:]
+    return new_node
+
+
+def static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_black, target_color, next_turn_color,
+                            pawns_can_move=None):
     """This function computes the heuristic value of the current board. The evaluation is based on the logic
-    introduced in the lecture. you win = +10, opponent win = -10, otherwise board value = # of your pawns - # of
-    opponent's pawns.
+    introduced in the lecture. you win = +win value, opponent win = -win value, otherwise board value = # of your
+    pawns - # of opponent's pawns. The win value is 10, or the number of columns on wider boards (see board_win_value).
 
     Args:
         cur_board: The n-element list.
@@ -292,51 +944,55 @@ def static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_bl
         number_of_black: The total number of black pawns.
         target_color: A character indicates who is the player given this situation(Max).
         next_turn_color: A character indicates which side that needs to generate new nodes and plays the next move.
+        pawns_can_move: Whether the side to move has a valid move, when the caller already generated its moves.
+            By default it is checked with if_can_move.
 
     Returns: The static board value.
 
     """
     board_value = 0
+    win_value = board_win_value(cur_board)
     first_row = cur_board[0]
     last_row = cur_board[len(cur_board) - 1]
 
     # check if one side's pawns has reached the opposite side
     if first_row.find("b") != -1:
         if target_color == "b":  # black turn and black wins
-            board_value = 10
+            board_value = win_value
         else:  # white turn and black wins
-            board_value = -10
+            board_value = -win_value
         return board_value
 
     if last_row.find("w") != -1:
         if target_color == "w":  # white turn and white wins
-            board_value = 10
+            board_value = win_value
         else:  # black turn and white wins
-            board_value = -10
+            board_value = -win_value
         return board_value
 
     # check if one side's loses all pawns
     if number_of_white == 0:
         if target_color == "w":  # white turn and no white pawns
-            board_value = -10
+            board_value = -win_value
         else:
-            board_value = 10  # black turn and no white pawns
+            board_value = win_value  # black turn and no white pawns
         return board_value
 
     if number_of_black == 0:
         if target_color == "b":  # black turn and no black pawns
-            board_value = -10
+            board_value = -win_value
         else:
-            board_value = 10  # white turn and no black pawns
+            board_value = win_value  # white turn and no black pawns
         return board_value
 
     # check if all pawns cannot move
-    pawns_can_move = if_can_move(cur_board, pawn_codes, next_turn_color)
+    if pawns_can_move is None:
+        pawns_can_move = if_can_move(cur_board, pawn_codes, next_turn_color)
     if not pawns_can_move:  # current side loses the game
         if next_turn_color == target_color:  # if we do the next move but cannot move
-            board_value = -10
+            board_value = -win_value
         else:  # if the opponent do the next move but cannot move
-            board_value = 10
+            board_value = win_value
         return board_value
 
     # compute the difference between pawns' count since no one has won
@@ -348,6 +1004,34 @@ def static_board_evaluation(cur_board, pawn_codes, number_of_white, number_of_bl
     return board_value
 
 
+def board_win_value(cur_board):
+    """This function gives the static board value of a won position.
+
+    It is 10 up to 10 columns and the number of columns on wider boards, the win value of
+    hexapawn_bitboard.BoardGeometry, so that it is always above any difference of pawn counts.
+
+    Args:
+        cur_board: The n-element list.
+
+    Returns:
+        The win value.
+    """
+    return max(hexapawn_bitboard.WIN_VALUE, len(cur_board[0]))
+
+
+def is_winning_value(board_value, cur_board):
+    """This function checks if a static board value is a win, which no other move can beat.
+
+    Args:
+        board_value: A static board value for the player to move.
+        cur_board: The board the value was found from.
+
+    Returns:
+        A boolean value.
+    """
+    return board_value == board_win_value(cur_board)
+
+
 def locate_pawns(cur_board):
     """This function gets the positions of each pawn.
 
@@ -377,12 +1061,12 @@ def locate_pawns(cur_board):
                 continue
             elif cur_square == "w":  # square has a white pawn
                 pawn_code += "w"
-                pawn_code += str(i)
-                pawn_code += str(j)
             else:  # square has a black pawn
                 pawn_code += "b"
-                pawn_code += str(i)
-                pawn_code += str(j)
+            pawn_code += str(i)
+            if i >= 10 or j >= 10:  # two-digit indices need a separator, e.g. "w10,3"
+                pawn_code += ","
+            pawn_code += str(j)
 
             # push the code into returned list
             pawn_codes.append(pawn_code)
@@ -390,6 +1074,21 @@ def locate_pawns(cur_board):
     return pawn_codes, number_of_white, number_of_black
 
 
+def decode_pawn_code(pawn_code):
+    """This function gets the position of a pawn back from its pawn code.
+
+    Args:
+        pawn_code: A pawn code like "w12" (row 1, column 2), or "w10,3" when an index has two digits.
+
+    Returns:
+        The row index and the column index.
+    """
+    if len(pawn_code) == 3:
+        return int(pawn_code[1]), int(pawn_code[2])
+    row_code, col_code = pawn_code[1:].split(",")
+    return int(row_code), int(col_code)
+
+
 def if_can_move(cur_board, pawn_codes, whose_turn):
     """This function checks if the current side player can move without invoking move generator function.
 
@@ -408,15 +1107,14 @@ def if_can_move(cur_board, pawn_codes, whose_turn):
         if pawn_code[0] != whose_turn:
             continue
         else:  # check if the current pawn can move or not
-            cur_row_idx = int(pawn_code[1])
-            cur_col_idx = int(pawn_code[2])
-            board_size = len(cur_board)
+            cur_row_idx, cur_col_idx = decode_pawn_code(pawn_code)
+            board_size = (len(cur_board), len(cur_board[0]))
             if whose_turn == "w":  # white pawn moves down
                 # check if can move down
                 new_row_idx_down = cur_row_idx + 1
                 new_col_idx_down = cur_col_idx
                 if if_on_the_board(new_row_idx_down, new_col_idx_down, board_size) and cur_board[new_row_idx_down][
-                    new_col_idx_down] == "-":
+                        new_col_idx_down] == "-":
                     one_pawn_can_move = True
                     return one_pawn_can_move
 
@@ -470,12 +1168,16 @@ def if_on_the_board(row_index, col_index, board_size):
     Args:
         row_index: The row index of the move.
         col_index: The column index of the move.
-        board_size: The size of the board.
+        board_size: The size of a square board, or a (rows, columns) pair.
 
     Returns:
         A boolean value indicates whether the move is on the board or not.
     """
-    if board_size > row_index >= 0 and board_size > col_index >= 0:
+    if isinstance(board_size, int):
+        number_of_rows = number_of_cols = board_size
+    else:
+        number_of_rows, number_of_cols = board_size
+    if number_of_rows > row_index >= 0 and number_of_cols > col_index >= 0:
         return True
     else:
         return False
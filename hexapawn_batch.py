@@ -0,0 +1,178 @@
+# hexapawn_batch.py
+# Batch evaluation: many (board, board_size, color, depth) requests in one call, streamed back in order.
+#
+# Identical requests are searched once, and so are symmetric ones: requests are keyed by their canonical position
+# (see hexapawn_symmetry), and each answer is mapped back to the orientation of its request. The searches of one
+# batch share a transposition table per board size.
+# With workers, chunks of requests are fanned out over the process pool of hexapawn_parallel, whose worker processes
+# keep their own tables warm between chunks.
+
+from collections import OrderedDict, deque
+from itertools import islice
+
+import hexapawn_bitboard
+import hexapawn_parallel
+import hexapawn_symmetry
+import hexapawn_transposition
+
+DEFAULT_CHUNK_SIZE = 256  # requests sent to a worker process at a time
+DEFAULT_MAX_CACHED_RESULTS = 100000  # results kept to answer duplicate requests
+
+
+def canonical_request(request):
+    """This function turns a request into a hashable key shared by the request and its symmetric images.
+
+    Args:
+        request: A (board, board_size, color, depth) tuple, the board being a list of strings.
+
+    Returns:
+        A tuple usable as a dictionary key, holding the canonical board, and the transform from the request to it.
+    """
+    cur_board, board_size, pawn_color, number_moves_ahead = request
+    canonical_board, canonical_color, transform = hexapawn_symmetry.canonical_position(cur_board, pawn_color)
+    return (canonical_board, hexapawn_bitboard.board_dimensions(board_size), canonical_color,
+            number_moves_ahead), transform
+
+
+def request_key(request):
+    """This function turns a request into a hashable key, so identical and symmetric positions are found.
+
+    Args:
+        request: A (board, board_size, color, depth) tuple, the board being a list of strings.
+
+    Returns:
+        A tuple usable as a dictionary key.
+    """
+    return canonical_request(request)[0]
+
+
+def search_request(key, transposition_table, deadline=None):
+    """This function searches one canonical request.
+
+    Args:
+        key: A request key returned by request_key.
+        transposition_table: The table shared by the searches of the same board size.
+        deadline: An optional time.perf_counter() value after which the search gives up.
+
+    Returns:
+        Every answer of the canonical position as good as the best one, for resolve_request.
+
+    Raises:
+        hexapawn_bitboard.SearchTimeout: The deadline has passed.
+    """
+    cur_board, board_size, pawn_color, number_moves_ahead = key
+    answers, best_value = hexapawn_bitboard.tied_moves_algorithm(list(cur_board), board_size, pawn_color,
+                                                                 number_moves_ahead, transposition_table,
+                                                                 deadline=deadline)
+    return answers
+
+
+def resolve_request(key, transform, result):
+    """This function turns the result of a canonical request into the answer of one of its images.
+
+    Args:
+        key: A request key returned by canonical_request.
+        transform: The transform from the request to the key, returned with it.
+        result: The result of search_request for the key.
+
+    Returns:
+        A list of strings represents the next best move, the same one hexapawn.hexapawn returns for the request.
+    """
+    cur_board, board_size, pawn_color, number_moves_ahead = key
+    return hexapawn_symmetry.resolve_move(hexapawn_symmetry.transform_board(cur_board, transform), board_size,
+                                          hexapawn_symmetry.transform_color(pawn_color, transform), transform, result)
+
+
+def search_chunk(keys):
+    """This function searches a chunk of requests inside a worker process.
+
+    Args:
+        keys: A list of request keys.
+
+    Returns:
+        The list of search_request results, in the same order.
+    """
+    return [search_request(key, hexapawn_parallel.get_worker_table(key[1])) for key in keys]
+
+
+def search_batch(requests, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 max_cached_results=DEFAULT_MAX_CACHED_RESULTS):
+    """This function searches many positions and streams the best moves back in request order.
+
+    The requests are read lazily, so the input can be a generator of any length. Each result is a new list, the same
+    one hexapawn.hexapawn returns for that request.
+
+    Args:
+        requests: An iterable of (board, board_size, color, depth) tuples.
+        workers: The number of worker processes. None or 1 searches in this process.
+        chunk_size: The number of requests read and sent to a worker at a time.
+        max_cached_results: The number of recent results kept to answer duplicate requests.
+
+    Yields:
+        The best move of each request, a list of strings.
+    """
+    cached_results = OrderedDict()
+
+    def remember(key, result):
+        cached_results[key] = result
+        if len(cached_results) > max_cached_results:
+            cached_results.popitem(last=False)
+
+    if workers is None or workers == 1:
+        tables = {}
+        for request in requests:
+            key, transform = canonical_request(request)
+            result = cached_results.get(key)
+            if result is None:
+                board_size = key[1]
+                if board_size not in tables:
+                    tables[board_size] = hexapawn_transposition.TranspositionTable()
+                result = search_request(key, tables[board_size])
+                remember(key, result)
+            else:
+                cached_results.move_to_end(key)
+            yield resolve_request(key, transform, result)
+        return
+
+    pool = hexapawn_parallel.get_process_pool(workers)
+    in_flight = {}  # key -> (future, index in its chunk), for keys submitted but not yet collected
+    pending_chunks = deque()
+    requests = iter(requests)
+    while True:
+        # keep two chunks per worker in flight so the workers never wait for the consumer
+        while len(pending_chunks) < 2 * workers:
+            chunk = list(islice(requests, chunk_size))
+            if not chunk:
+                break
+            chunk_keys = [canonical_request(request) for request in chunk]
+            known_results = {}
+            submitted_keys = []
+            for key, transform in chunk_keys:
+                if key in known_results:
+                    continue
+                if key in cached_results:
+                    known_results[key] = cached_results[key]
+                elif key in in_flight:
+                    known_results[key] = in_flight[key]
+                else:
+                    known_results[key] = None  # filled in once the chunk is submitted
+                    submitted_keys.append(key)
+            future = pool.submit(search_chunk, submitted_keys) if submitted_keys else None
+            for index, key in enumerate(submitted_keys):
+                in_flight[key] = known_results[key] = (future, index)
+            pending_chunks.append((chunk_keys, known_results, submitted_keys, future))
+
+        if not pending_chunks:
+            return
+
+        chunk_keys, known_results, submitted_keys, future = pending_chunks.popleft()
+        if future is not None:
+            for key, result in zip(submitted_keys, future.result()):
+                remember(key, result)
+                del in_flight[key]
+        for key, transform in chunk_keys:
+            result = known_results[key]
+            if isinstance(result, tuple):  # computed by this chunk or an earlier one
+                result_future, index = result
+                result = result_future.result()[index]
+            yield resolve_request(key, transform, result)
@@ -0,0 +1,312 @@
+# hexapawn_benchmark.py
+# Benchmark suite: microbenchmarks of the board helpers and full searches over a fixed corpus of positions.
+#
+# Results are written as JSON. Given the JSON of an earlier run as a baseline, the median latencies are compared and
+# the tool exits with status 1 if any benchmark got slower than the tolerance allows, so it can gate a change.
+#
+#     python hexapawn_benchmark.py --output baseline.json
+#     python hexapawn_benchmark.py --baseline baseline.json
+
+import argparse
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+
+import hexapawn
+import hexapawn_statistics
+
+DEFAULT_DEPTHS = (2, 4, 6)
+DEFAULT_MODES = ("bitboard",)
+DEFAULT_SAMPLES = 15
+DEFAULT_MICRO_SAMPLES = 30
+MIN_SAMPLE_SECONDS = 0.005  # faster calls are repeated within a sample, so the timer resolution does not matter
+DEFAULT_TOLERANCE = 0.10  # a median latency this much above the baseline is a regression
+
+
+def starting_board(board_size):
+    """This function builds the starting position of a square board.
+
+    Args:
+        board_size: The size of the board.
+
+    Returns:
+        The n-element list.
+    """
+    return ["w" * board_size] + ["-" * board_size] * (board_size - 2) + ["b" * board_size]
+
+
+# (name, board, board size, color to move); the midgames and endgames come from fixed random games
+CORPUS = [("opening-%d" % board_size, starting_board(board_size), board_size, "w") for board_size in range(3, 9)] + [
+    ("midgame-3", ["w--", "-w-", "bb-"], 3, "b"),
+    ("endgame-3", ["---", "-wb", "b--"], 3, "b"),
+    ("midgame-4", ["ww-w", "----", "---b", "bb--"], 4, "w"),
+    ("endgame-4", ["----", "wb--", "----", "---b"], 4, "w"),
+    ("midgame-5", ["---w-", "-w--w", "-w---", "--b--", "---bb"], 5, "b"),
+    ("endgame-5", ["-----", "--b--", "w----", "----w", "----b"], 5, "b"),
+    ("midgame-6", ["w-w---", "------", "-w-wb-", "------", "-bb--w", "b-----"], 6, "b"),
+    ("endgame-6", ["------", "------", "-wbww-", "------", "-----w", "------"], 6, "b"),
+    ("midgame-7", ["-w--w--", "w------", "--w----", "---wb--", "-------", "-b-----", "b-b--b-"], 7, "w"),
+    ("endgame-7", ["-------", "-------", "-w-----", "w-----w", "----b-w", "---w---", "-------"], 7, "b"),
+    ("midgame-8", ["--------", "-----w--", "-w--wb--", "---w----", "b-b---b-", "b------w", "--b----b", "--------"],
+     8, "w"),
+    ("endgame-8", ["--------", "-------w", "-----w--", "--w-w---", "-------b", "w---w---", "--------", "--------"],
+     8, "w"),
+]
+
+
+def percentile(sorted_values, fraction):
+    """This function picks a percentile of sorted values with the nearest-rank method.
+
+    Args:
+        sorted_values: A non-empty list of numbers in increasing order.
+        fraction: The percentile as a number between 0 and 1.
+
+    Returns:
+        The value below which the given fraction of the values lie.
+    """
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_latencies(latencies):
+    """This function reduces the latencies of the samples of one benchmark to the numbers the report shows.
+
+    Args:
+        latencies: A list of durations, in seconds.
+
+    Returns:
+        A dictionary of the minimum, mean, 50th, 90th and 99th percentiles, in microseconds.
+    """
+    sorted_latencies = sorted(latencies)
+    return {
+        "min_us": sorted_latencies[0] * 1e6,
+        "mean_us": sum(sorted_latencies) / len(sorted_latencies) * 1e6,
+        "p50_us": percentile(sorted_latencies, 0.50) * 1e6,
+        "p90_us": percentile(sorted_latencies, 0.90) * 1e6,
+        "p99_us": percentile(sorted_latencies, 0.99) * 1e6,
+    }
+
+
+def time_calls(function, samples):
+    """This function times a function the way timeit does, with the garbage collector off during the samples.
+
+    A call faster than MIN_SAMPLE_SECONDS is repeated within each sample, the same number of times in every sample,
+    and the latency of the sample is the time per call.
+
+    Args:
+        function: The function to time, called without arguments.
+        samples: The number of samples.
+
+    Returns:
+        The list of latencies, in seconds.
+    """
+    started_at = time.perf_counter()
+    function()  # untimed, also so the samples do not depend on what the previous benchmark left behind
+    calls_per_sample = max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - started_at, 1e-9)))
+
+    latencies = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for sample in range(samples):
+            started_at = time.perf_counter()
+            for call in range(calls_per_sample):
+                function()
+            latencies.append((time.perf_counter() - started_at) / calls_per_sample)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return latencies
+
+
+def measure_peak_memory(function, *args, **kwargs):
+    """This function runs a function once under tracemalloc.
+
+    It is a separate run from the timed ones, as tracing every allocation slows the code down.
+
+    Args:
+        function: The function to run.
+        *args: Its positional arguments.
+        **kwargs: Its keyword arguments.
+
+    Returns:
+        The peak memory allocated during the call, in bytes.
+    """
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_memory
+
+
+def run_microbenchmarks(corpus, samples):
+    """This function times locate_pawns, move_generator and if_can_move over the corpus.
+
+    A call is one pass over every position of the corpus, and the latencies are divided by the size of the corpus,
+    so they are per position. They are only comparable between runs over the same board sizes.
+
+    Args:
+        corpus: A list of (name, board, board size, color) tuples.
+        samples: The number of samples of each function.
+
+    Returns:
+        A dictionary of benchmark name to results.
+    """
+    located_corpus = [(cur_board, board_size, pawn_color, hexapawn.locate_pawns(cur_board)[0])
+                      for name, cur_board, board_size, pawn_color in corpus]
+    benchmarks = {
+        "locate_pawns": lambda cur_board, board_size, pawn_color, pawn_codes: hexapawn.locate_pawns(cur_board),
+        "move_generator": lambda cur_board, board_size, pawn_color, pawn_codes: hexapawn.move_generator(
+            cur_board, board_size, pawn_color, pawn_codes),
+        "if_can_move": lambda cur_board, board_size, pawn_color, pawn_codes: hexapawn.if_can_move(
+            cur_board, pawn_codes, pawn_color),
+    }
+
+    results = {}
+    for benchmark_name, function in benchmarks.items():
+        def corpus_pass():
+            for arguments in located_corpus:
+                function(*arguments)
+
+        latencies = [latency / len(located_corpus) for latency in time_calls(corpus_pass, samples)]
+        result = summarize_latencies(latencies)
+        result["calls_per_second"] = 1e6 / result["p50_us"] if result["p50_us"] > 0 else 0.0
+        result["peak_memory_bytes"] = measure_peak_memory(corpus_pass)
+        results["micro/" + benchmark_name] = result
+    return results
+
+
+def run_search_benchmarks(corpus, modes, depths, samples):
+    """This function times full searches of every corpus position.
+
+    Every search is a cold one, without a transposition table kept from an earlier call.
+
+    Args:
+        corpus: A list of (name, board, board size, color) tuples.
+        modes: The search modes of hexapawn.hexapawn to run.
+        depths: The numbers of moves to look ahead.
+        samples: The number of samples of each position.
+
+    Returns:
+        A dictionary of benchmark name to results. The node counts are only known for the modes of
+        hexapawn.STATISTICS_MODES, the others report None.
+    """
+    results = {}
+    for search_mode in modes:
+        for number_moves_ahead in depths:
+            for name, cur_board, board_size, pawn_color in corpus:
+                result = summarize_latencies(time_calls(
+                    lambda: hexapawn.hexapawn(cur_board, board_size, pawn_color, number_moves_ahead, search_mode),
+                    samples))
+
+                statistics = hexapawn_statistics.SearchStatistics()
+                if search_mode in hexapawn.STATISTICS_MODES:
+                    hexapawn.hexapawn(cur_board, board_size, pawn_color, number_moves_ahead, search_mode,
+                                      statistics=statistics)
+                if statistics.nodes:
+                    result["nodes"] = statistics.nodes
+                    result["nodes_per_second"] = statistics.nodes / (result["p50_us"] / 1e6)
+                else:
+                    result["nodes"] = result["nodes_per_second"] = None
+                result["peak_memory_bytes"] = measure_peak_memory(hexapawn.hexapawn, cur_board, board_size,
+                                                                  pawn_color, number_moves_ahead, search_mode)
+                results["search/%s/depth-%d/%s" % (search_mode, number_moves_ahead, name)] = result
+    return results
+
+
+def run_benchmarks(modes=DEFAULT_MODES, depths=DEFAULT_DEPTHS, samples=DEFAULT_SAMPLES,
+                   micro_samples=DEFAULT_MICRO_SAMPLES, sizes=None):
+    """This function runs the whole suite.
+
+    Args:
+        modes: The search modes of hexapawn.hexapawn to run.
+        depths: The numbers of moves to look ahead.
+        samples: The number of samples of each search.
+        micro_samples: The number of samples of each microbenchmark.
+        sizes: The board sizes of the corpus to use, by default all of them.
+
+    Returns:
+        A dictionary ready for json.dump, with the environment and the results of every benchmark.
+    """
+    corpus = [entry for entry in CORPUS if sizes is None or entry[2] in sizes]
+    benchmarks = run_microbenchmarks(corpus, micro_samples)
+    benchmarks.update(run_search_benchmarks(corpus, modes, depths, samples))
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_with_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """This function compares the median latencies of a run with those of a baseline run.
+
+    Args:
+        report: The dictionary returned by run_benchmarks.
+        baseline: A dictionary returned by run_benchmarks earlier, usually read back from its JSON file.
+        tolerance: The relative slowdown above which a benchmark counts as a regression.
+
+    Returns:
+        A list of (benchmark name, baseline p50, current p50, ratio, is regression) tuples, for the benchmarks both
+        runs have.
+    """
+    comparisons = []
+    baseline_benchmarks = baseline["benchmarks"]
+    for name, result in sorted(report["benchmarks"].items()):
+        if name not in baseline_benchmarks:
+            continue
+        baseline_p50 = baseline_benchmarks[name]["p50_us"]
+        ratio = result["p50_us"] / baseline_p50 if baseline_p50 > 0 else 1.0
+        comparisons.append((name, baseline_p50, result["p50_us"], ratio, ratio > 1.0 + tolerance))
+    return comparisons
+
+
+def main(argv=None):
+    """This function is the command line tool that runs the suite."""
+    parser = argparse.ArgumentParser(description="Benchmark the hexapawn move generator and searches.")
+    parser.add_argument("--modes", nargs="+", default=list(DEFAULT_MODES), help="the search modes to benchmark")
+    parser.add_argument("--depths", nargs="+", type=int, default=list(DEFAULT_DEPTHS),
+                        help="the numbers of moves to look ahead")
+    parser.add_argument("--sizes", nargs="+", type=int, help="the board sizes of the corpus, by default 3 to 8")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="samples per search")
+    parser.add_argument("--micro-samples", type=int, default=DEFAULT_MICRO_SAMPLES,
+                        help="samples per microbenchmark")
+    parser.add_argument("--output", help="the JSON file to write the results to, by default standard output")
+    parser.add_argument("--baseline", help="the JSON file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="the relative slowdown that counts as a regression")
+    arguments = parser.parse_args(argv)
+
+    report = run_benchmarks(arguments.modes, arguments.depths, arguments.samples, arguments.micro_samples,
+                            arguments.sizes)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = 0
+        for name, baseline_p50, current_p50, ratio, is_regression in compare_with_baseline(report, baseline,
+                                                                                            arguments.tolerance):
+            regressions += is_regression
+            print("%-50s %12.1f us %12.1f us %7.2fx%s" % (name, baseline_p50, current_p50, ratio,
+                                                          "  REGRESSION" if is_regression else ""), file=sys.stderr)
+        if regressions:
+            print("%d benchmarks regressed" % regressions, file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
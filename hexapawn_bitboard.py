@@ -0,0 +1,784 @@
+# hexapawn_bitboard.py
+# Integer bitboard engine for hexapawn.
+#
+# A position is two Python ints, one per color. Bit (row * cols + col) is set when that square holds a pawn of the
+# color, so row 0 is the lowest bits. Python ints have no size limit, so any N x M board works, 16x16 included.
+# White pawns move down (towards higher rows, a left shift by cols) and black pawns move up (a right shift by cols).
+# Moves are (from square, to square) tuples of square indices.
+
+import time
+
+import hexapawn_transposition
+from hexapawn_transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+
+INFINITY = 2100000000  # larger than any static board value
+WIN_VALUE = 10  # the static board value of a won position, on boards of up to 10 columns
+
+TIME_CHECK_INTERVAL = 256  # nodes searched between two clock reads
+AUTO_TABLE_MIN_DEPTH = 4  # searches this deep get a transposition table even if the caller passes none
+AUTO_TABLE_BYTES = 1024 * 1024
+
+_geometries = {}
+
+
+class BoardGeometry:
+    """The masks of one board size, shared by every position of that size.
+
+    Attributes:
+        rows: The number of rows.
+        cols: The number of columns.
+        full_mask: All squares of the board.
+        first_row_mask: The squares of row 0, where black wins.
+        last_row_mask: The squares of the last row, where white wins.
+        not_first_col_mask: All squares except column 0.
+        not_last_col_mask: All squares except the last column.
+        mirror_squares: The square each square goes to when the board is mirrored left to right.
+        mirror_column_pairs: A (column mask, mirror column mask, shift) triple for each column left of the middle,
+            the shift moving the column onto its mirror image.
+        win_value: The static board value of a won position. It stays 10 as in hexapawn.py up to 10 columns, and
+            grows with wider boards so that it is always above any difference of pawn counts.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.win_value = max(WIN_VALUE, cols)
+        self.full_mask = (1 << (rows * cols)) - 1
+        self.first_row_mask = (1 << cols) - 1
+        self.last_row_mask = self.first_row_mask << ((rows - 1) * cols)
+        first_col_mask = 0
+        for row_idx in range(rows):
+            first_col_mask |= 1 << (row_idx * cols)
+        self.not_first_col_mask = self.full_mask & ~first_col_mask
+        self.not_last_col_mask = self.full_mask & ~(first_col_mask << (cols - 1))
+        self.mirror_squares = [row_idx * cols + cols - 1 - col_idx for row_idx in range(rows)
+                               for col_idx in range(cols)]
+        self.mirror_column_pairs = [(first_col_mask << col_idx, first_col_mask << (cols - 1 - col_idx),
+                                     cols - 1 - 2 * col_idx) for col_idx in range(cols // 2)]
+
+
+def board_dimensions(board_size):
+    """This function reads the number of rows and columns from a board size.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+
+    Returns:
+        The number of rows and the number of columns.
+    """
+    if isinstance(board_size, int):
+        return board_size, board_size
+    rows, cols = board_size
+    return rows, cols
+
+
+def get_geometry(board_size):
+    """This function returns the cached masks of a board.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+
+    Returns:
+        A BoardGeometry.
+    """
+    rows, cols = board_dimensions(board_size)
+    geometry = _geometries.get((rows, cols))
+    if geometry is None:
+        if rows < 2 or cols < 1:
+            raise ValueError("a board needs at least 2 rows and 1 column, got %d x %d" % (rows, cols))
+        geometry = _geometries[(rows, cols)] = BoardGeometry(rows, cols)
+    return geometry
+
+
+def board_to_bitboards(cur_board):
+    """This function converts a list of strings into the white and black bitboards.
+
+    Args:
+        cur_board: The n-element list.
+
+    Returns:
+        The white bitboard and the black bitboard.
+    """
+    white = 0
+    black = 0
+    square = 0
+    for row_string in cur_board:
+        for cur_square in row_string:
+            if cur_square == "w":
+                white |= 1 << square
+            elif cur_square == "b":
+                black |= 1 << square
+            square += 1
+    return white, black
+
+
+def bitboards_to_board(white, black, geometry):
+    """This function converts the white and black bitboards back into a list of strings.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        The n-element list.
+    """
+    cur_board = []
+    square = 0
+    for row_idx in range(geometry.rows):
+        row_squares = []
+        for col_idx in range(geometry.cols):
+            bit = 1 << square
+            if white & bit:
+                row_squares.append("w")
+            elif black & bit:
+                row_squares.append("b")
+            else:
+                row_squares.append("-")
+            square += 1
+        cur_board.append("".join(row_squares))
+    return cur_board
+
+
+def move_targets(white, black, whose_turn, geometry):
+    """This function computes, in one shift-and-mask step per direction, where the pawns of one side can go.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        The squares reachable by moving forward, by capturing towards column - 1 and by capturing towards
+        column + 1, each as a bitboard of destination squares.
+    """
+    cols = geometry.cols
+    if whose_turn == "w":  # white pawn moves down
+        forward_targets = (white << cols) & geometry.full_mask & ~(white | black)
+        left_targets = ((white & geometry.not_first_col_mask) << (cols - 1)) & black
+        right_targets = ((white & geometry.not_last_col_mask) << (cols + 1)) & black
+    else:  # black pawn moves up
+        forward_targets = (black >> cols) & ~(white | black)
+        left_targets = ((black & geometry.not_first_col_mask) >> (cols + 1)) & white
+        right_targets = ((black & geometry.not_last_col_mask) >> (cols - 1)) & white
+    return forward_targets, left_targets, right_targets
+
+
+def can_move(white, black, whose_turn, geometry):
+    """This function checks if the current side can move without generating the moves.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        A boolean value indicates whether the current side can move or not.
+    """
+    forward_targets, left_targets, right_targets = move_targets(white, black, whose_turn, geometry)
+    return (forward_targets | left_targets | right_targets) != 0
+
+
+def is_mirror_symmetric(white, black, geometry):
+    """This function checks if a position is its own left-right mirror image.
+
+    Each column is compared with its mirror column, from the edges inwards, so most positions are ruled out by the
+    first pair.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        A boolean value.
+    """
+    for column_mask, mirror_column_mask, shift in geometry.mirror_column_pairs:
+        if (white & column_mask) << shift != white & mirror_column_mask or \
+                (black & column_mask) << shift != black & mirror_column_mask:
+            return False
+    return True
+
+
+def unique_moves(moves, geometry):
+    """This function drops the moves of a mirror-symmetric position that mirror an earlier move.
+
+    The two moves of a mirrored pair lead to mirrored positions with the same value, so only the first one in
+    generator order needs a search. A pawn left of the middle column comes before its mirror image, and the middle
+    pawn captures towards column - 1 before column + 1, so a move is kept when it is not above its mirror image.
+
+    Args:
+        moves: The moves of a mirror-symmetric position, in generator order.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        A new list with the kept moves, in the same order.
+    """
+    mirror_squares = geometry.mirror_squares
+    return [move for move in moves if move <= (mirror_squares[move[0]], mirror_squares[move[1]])]
+
+
+def mirror_move(move, geometry):
+    """This function mirrors a move left to right.
+
+    Args:
+        move: A (from square, to square) tuple.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        The mirrored (from square, to square) tuple.
+    """
+    return geometry.mirror_squares[move[0]], geometry.mirror_squares[move[1]]
+
+
+def generate_moves(white, black, whose_turn, geometry):
+    """This function lists the valid moves of the current side.
+
+    The moves come in the same order as the boards built by hexapawn.move_generator: pawns in row-major order, and
+    for each pawn the forward move, then the capture towards column - 1, then the capture towards column + 1.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        A list of (from square, to square) tuples.
+    """
+    forward_targets, left_targets, right_targets = move_targets(white, black, whose_turn, geometry)
+    cols = geometry.cols
+    if whose_turn == "w":
+        forward_step, left_step, right_step = cols, cols - 1, cols + 1
+        movers = white
+    else:
+        forward_step, left_step, right_step = -cols, -cols - 1, -cols + 1
+        movers = black
+
+    # only the pawns that have at least one move
+    if whose_turn == "w":
+        movers &= (forward_targets >> cols) | (left_targets >> (cols - 1)) | (right_targets >> (cols + 1))
+    else:
+        movers &= (forward_targets << cols) | (left_targets << (cols + 1)) | (right_targets << (cols - 1))
+
+    moves = []
+    while movers:
+        low_bit = movers & -movers
+        movers ^= low_bit
+        from_square = low_bit.bit_length() - 1
+        if forward_targets >> (from_square + forward_step) & 1:
+            moves.append((from_square, from_square + forward_step))
+        if from_square + left_step >= 0 and left_targets >> (from_square + left_step) & 1:
+            moves.append((from_square, from_square + left_step))
+        if from_square + right_step >= 0 and right_targets >> (from_square + right_step) & 1:
+            moves.append((from_square, from_square + right_step))
+    return moves
+
+
+def make_move(white, black, move, whose_turn):
+    """This function plays one move.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        move: A (from square, to square) tuple.
+        whose_turn: A character indicates which side plays the move.
+
+    Returns:
+        The new white bitboard and the new black bitboard.
+    """
+    from_bit = 1 << move[0]
+    to_bit = 1 << move[1]
+    if whose_turn == "w":
+        return white ^ from_bit ^ to_bit, black & ~to_bit
+    else:
+        return white & ~to_bit, black ^ from_bit ^ to_bit
+
+
+def static_board_evaluation(white, black, whose_turn, geometry):
+    """This function computes the heuristic value of a position from the point of view of the side to move.
+
+    It follows hexapawn.static_board_evaluation with the side to move as the target color: you win = +win value,
+    opponent win = -win value, otherwise board value = # of your pawns - # of opponent's pawns. The win value is 10
+    up to 10 columns.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        geometry: The BoardGeometry of the board.
+
+    Returns:
+        The static board value and a boolean value indicates whether the game is over.
+    """
+    # check if one side's pawns has reached the opposite side
+    if black & geometry.first_row_mask:
+        return (geometry.win_value if whose_turn == "b" else -geometry.win_value), True
+    if white & geometry.last_row_mask:
+        return (geometry.win_value if whose_turn == "w" else -geometry.win_value), True
+
+    # check if one side's loses all pawns
+    if not white:
+        return (-geometry.win_value if whose_turn == "w" else geometry.win_value), True
+    if not black:
+        return (-geometry.win_value if whose_turn == "b" else geometry.win_value), True
+
+    # check if all pawns cannot move
+    if not can_move(white, black, whose_turn, geometry):
+        return -geometry.win_value, True
+
+    if whose_turn == "w":
+        return white.bit_count() - black.bit_count(), False
+    else:
+        return black.bit_count() - white.bit_count(), False
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its deadline has passed."""
+
+
+class BitboardSearch:
+    """An alpha-beta search over bitboard positions, with its move ordering tables.
+
+    The search is written in negamax form: every value is from the point of view of the side to move, which gives
+    the same values as the max/min pair in hexapawn.py because the static board value is antisymmetric.
+
+    Attributes:
+        geometry: The BoardGeometry of the board.
+        transposition_table: An optional hexapawn_transposition.TranspositionTable, which may be shared by several
+            searches of the same game.
+        zobrist_keys: The Zobrist keys of the board size.
+        killer_moves: The two most recent cutoff moves of each ply.
+        history_scores: The cutoff score of each (color, move).
+        principal_variation: The best line found by the last completed iteration of iterative_deepening.
+        deadline: The time.perf_counter() value after which the search raises SearchTimeout, or None.
+        node_count: The number of nodes searched so far.
+        statistics: An optional hexapawn_statistics.SearchStatistics the search adds its counters to.
+    """
+
+    def __init__(self, geometry, transposition_table=None, statistics=None):
+        self.geometry = geometry
+        self.transposition_table = transposition_table
+        self.statistics = statistics
+        self.zobrist_keys = hexapawn_transposition.get_zobrist_keys(geometry.rows, geometry.cols)
+        self.killer_moves = {}
+        self.history_scores = {}
+        self.principal_variation = []
+        self.deadline = None
+        self.node_count = 0
+
+    def order_moves(self, moves, white, black, whose_turn, ply, first_move=None):
+        """This function sorts the moves so that the most promising ones are searched first.
+
+        The first move (the best move stored in the transposition table) comes first, then winning moves (reaching
+        the last row or capturing the last pawn), then captures, then the killer moves of this ply, then the moves
+        with the highest history score. Ties keep their generator order.
+
+        Args:
+            moves: A list of moves returned by generate_moves.
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+            ply: The number of moves played from the root.
+            first_move: A move to search before all others, or None.
+
+        Returns:
+            A new list with the same moves in search order.
+        """
+        if whose_turn == "w":
+            opponent = black
+            goal_mask = self.geometry.last_row_mask
+        else:
+            opponent = white
+            goal_mask = self.geometry.first_row_mask
+        opponent_has_one_pawn = opponent & (opponent - 1) == 0
+        killer_moves = self.killer_moves.get(ply, ())
+        history_scores = self.history_scores
+
+        def move_priority(move):
+            to_bit = 1 << move[1]
+            is_capture = opponent & to_bit != 0
+            is_winning = goal_mask & to_bit != 0 or (is_capture and opponent_has_one_pawn)
+            return move == first_move, is_winning, is_capture, move in killer_moves, \
+                history_scores.get((whose_turn, move), 0)
+
+        return sorted(moves, key=move_priority, reverse=True)
+
+    def record_cutoff(self, move, whose_turn, depth, ply):
+        """This function remembers a move that caused a cutoff so it is tried early in the sibling nodes.
+
+        Args:
+            move: The move that caused the cutoff.
+            whose_turn: A character indicates which side played the move.
+            depth: The number of moves left to look ahead from the node of the cutoff.
+            ply: The number of moves played from the root.
+        """
+        killer_moves = self.killer_moves.setdefault(ply, [])
+        if move not in killer_moves:
+            killer_moves.insert(0, move)
+            del killer_moves[2:]
+        history_key = (whose_turn, move)
+        self.history_scores[history_key] = self.history_scores.get(history_key, 0) + depth * depth
+
+    def negamax(self, white, black, whose_turn, depth, alpha, beta, ply, position_hash=0):
+        """This function computes the value of a position with alpha-beta pruning.
+
+        A stored entry only answers a search of the same depth, so the values stay exactly those of a fixed-depth
+        minimax. The exception is a won or lost value: a win forced within fewer moves is still forced when looking
+        further ahead, so it answers any deeper search too.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+            depth: The number of moves left to look ahead.
+            alpha: The value the side to move is already guaranteed.
+            beta: The value the opponent is already guaranteed.
+            ply: The number of moves played from the root.
+            position_hash: The Zobrist hash of the position, only used with a transposition table.
+
+        Returns:
+            The value for the side to move. It is exact if it lies between alpha and beta, otherwise it is a bound.
+
+        Raises:
+            SearchTimeout: The deadline has passed.
+        """
+        self.node_count += 1
+        if self.deadline is not None and self.node_count % TIME_CHECK_INTERVAL == 0 and \
+                time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        statistics = self.statistics
+        if statistics is not None:
+            statistics.nodes_per_ply[ply] += 1
+
+        geometry = self.geometry
+        board_value, game_over = static_board_evaluation(white, black, whose_turn, geometry)
+        if depth == 0 or game_over:
+            if statistics is not None:
+                statistics.leaf_evaluations += 1
+            return board_value
+
+        table = self.transposition_table
+        table_move = None
+        if table is not None:
+            entry = table.probe(position_hash)
+            if entry is None:
+                if statistics is not None:
+                    statistics.cache_misses += 1
+            else:
+                if statistics is not None:
+                    statistics.cache_hits += 1
+                entry_depth, bound, entry_value, table_move = entry
+                if entry_depth == depth or (entry_depth < depth and (
+                        (entry_value == geometry.win_value and bound != UPPER_BOUND) or
+                        (entry_value == -geometry.win_value and bound != LOWER_BOUND))):
+                    if bound == EXACT or (bound == LOWER_BOUND and entry_value >= beta) or \
+                            (bound == UPPER_BOUND and entry_value <= alpha):
+                        if statistics is not None:
+                            statistics.table_cutoffs += 1
+                        return entry_value
+        if table_move is None and ply < len(self.principal_variation):
+            table_move = self.principal_variation[ply]
+
+        if statistics is not None:
+            statistics.move_generator_calls += 1
+        moves = generate_moves(white, black, whose_turn, geometry)
+        if is_mirror_symmetric(white, black, geometry):  # mirrored siblings have the same value
+            number_of_moves = len(moves)
+            moves = unique_moves(moves, geometry)
+            if statistics is not None:
+                statistics.mirror_duplicates += number_of_moves - len(moves)
+        moves = self.order_moves(moves, white, black, whose_turn, ply, table_move)
+        next_turn = "b" if whose_turn == "w" else "w"
+        original_alpha = alpha
+        best_value = -INFINITY
+        best_move = None
+        for move in moves:
+            new_white, new_black = make_move(white, black, move, whose_turn)
+            if table is not None:
+                new_hash = self.zobrist_keys.hash_after_move(position_hash, white, black, move, whose_turn)
+            else:
+                new_hash = 0
+            value = -self.negamax(new_white, new_black, next_turn, depth - 1, -beta, -alpha, ply + 1, new_hash)
+            if value > best_value:
+                best_value = value
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self.record_cutoff(move, whose_turn, depth, ply)
+                        if statistics is not None:
+                            statistics.cutoffs += 1
+                        break
+                if value == geometry.win_value:  # no other move can do better
+                    break
+
+        if table is not None:
+            if best_value <= original_alpha:
+                bound = UPPER_BOUND
+            elif best_value >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            table.store(position_hash, depth, bound, best_value, best_move)
+        return best_value
+
+    def search_root(self, white, black, whose_turn, depth, keep_ties=False):
+        """This function finds the best move of the side to move.
+
+        The moves are searched in move ordering order, but a move only replaces the current best one if it scores
+        higher, or scores the same and comes earlier in generator order. Because the values are integers, searching
+        an earlier move with alpha = best - 1 is enough to tell a tie from a worse move. The result is the same move
+        hexapawn.minimax_algorithm picks. On a mirror-symmetric position only the first move of each mirrored pair
+        is searched, which cannot change the pick.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+            depth: The number of moves to look ahead, at least 1.
+            keep_ties: Whether to find every move with the best value, by searching all of them with alpha = best - 1.
+
+        Returns:
+            The best move, or None if the game is over, and its value for the side to move. With keep_ties, the list
+            of the best moves in generator order (empty if the game is over) instead of the best move.
+        """
+        statistics = self.statistics
+        if statistics is not None:
+            started_at = time.perf_counter()
+            nodes_before = statistics.nodes
+            statistics.nodes_per_ply[0] += 1
+
+        board_value, game_over = static_board_evaluation(white, black, whose_turn, self.geometry)
+        if game_over:
+            if statistics is not None:
+                statistics.leaf_evaluations += 1
+                statistics.record_iteration(depth, time.perf_counter() - started_at, statistics.nodes - nodes_before)
+            return ([] if keep_ties else None), board_value
+
+        table = self.transposition_table
+        position_hash = 0
+        table_move = None
+        if table is not None:
+            table.new_search()
+            position_hash = self.zobrist_keys.hash_position(white, black, whose_turn)
+            entry = table.probe(position_hash)
+            if entry is not None:
+                table_move = entry[3]
+        if self.principal_variation:
+            table_move = self.principal_variation[0]
+
+        if statistics is not None:
+            statistics.move_generator_calls += 1
+        moves = generate_moves(white, black, whose_turn, self.geometry)
+        original_index_of_move = {move: index for index, move in enumerate(moves)}
+        symmetric = is_mirror_symmetric(white, black, self.geometry)
+        searched_moves = unique_moves(moves, self.geometry) if symmetric else moves
+        if statistics is not None:
+            statistics.mirror_duplicates += len(moves) - len(searched_moves)
+        next_turn = "b" if whose_turn == "w" else "w"
+
+        best_move = None
+        best_value = -INFINITY
+        best_move_index = len(moves)
+        tied_moves = []
+        for move in self.order_moves(searched_moves, white, black, whose_turn, 0, table_move):
+            move_index = original_index_of_move[move]
+            if move_index > best_move_index and best_value == self.geometry.win_value and not keep_ties:
+                continue  # a later move cannot beat a win
+            alpha = best_value - 1 if keep_ties or move_index < best_move_index else best_value
+            new_white, new_black = make_move(white, black, move, whose_turn)
+            if table is not None:
+                new_hash = self.zobrist_keys.hash_after_move(position_hash, white, black, move, whose_turn)
+            else:
+                new_hash = 0
+            try:
+                value = -self.negamax(new_white, new_black, next_turn, depth - 1, -INFINITY, -alpha, 1, new_hash)
+            except SearchTimeout:
+                if statistics is not None:
+                    statistics.record_iteration(depth, time.perf_counter() - started_at,
+                                                statistics.nodes - nodes_before, completed=False)
+                raise
+            if value > best_value:
+                tied_moves = [move]
+            elif value == best_value:
+                tied_moves.append(move)
+            if value > best_value or (value == best_value and move_index < best_move_index):
+                best_move, best_value, best_move_index = move, value, move_index
+
+        if table is not None:
+            table.store(position_hash, depth, EXACT, best_value, best_move)
+        if statistics is not None:
+            statistics.record_iteration(depth, time.perf_counter() - started_at, statistics.nodes - nodes_before)
+        if keep_ties:
+            if symmetric:  # the mirror image of a best move is just as good
+                tied_moves += [mirror_move(move, self.geometry) for move in tied_moves
+                               if mirror_move(move, self.geometry) != move]
+            return sorted(tied_moves, key=original_index_of_move.get), best_value
+        return best_move, best_value
+
+    def iterative_deepening(self, white, black, whose_turn, time_budget_ms, max_depth=None):
+        """This function searches one move deeper at a time until the time budget runs out.
+
+        Each iteration searches the principal variation of the previous one first, and the transposition table
+        gives the best moves of the other nodes. The first iteration always completes so that there is a move to
+        return. The search stops early once the result is a proven win or loss.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+            time_budget_ms: The wall-clock time the search may use, in milliseconds.
+            max_depth: The deepest iteration, by default the longest a game on this board can last.
+
+        Returns:
+            The best move (None if the game is over), its value and the depth of the last completed iteration.
+        """
+        started_at = time.perf_counter()
+        if max_depth is None:
+            max_depth = 2 * self.geometry.cols * (self.geometry.rows - 1)
+        if self.transposition_table is None:
+            self.transposition_table = hexapawn_transposition.TranspositionTable()
+
+        best_move, best_value = self.search_root(white, black, whose_turn, 1)
+        completed_depth = 1
+        self.principal_variation = self.extract_principal_variation(white, black, whose_turn, completed_depth)
+        self.deadline = started_at + time_budget_ms / 1000.0
+        try:
+            win_value = self.geometry.win_value
+            while best_move is not None and completed_depth < max_depth and abs(best_value) != win_value:
+                best_move, best_value = self.search_root(white, black, whose_turn, completed_depth + 1)
+                completed_depth += 1
+                self.principal_variation = self.extract_principal_variation(white, black, whose_turn,
+                                                                            completed_depth)
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+        return best_move, best_value, completed_depth
+
+    def extract_principal_variation(self, white, black, whose_turn, depth):
+        """This function follows the best moves stored in the transposition table from the root.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+            depth: The maximum length of the line.
+
+        Returns:
+            A list of moves, the expected line of play.
+        """
+        principal_variation = []
+        position_hash = self.zobrist_keys.hash_position(white, black, whose_turn)
+        while len(principal_variation) < depth:
+            entry = self.transposition_table.probe(position_hash)
+            if entry is None or entry[3] not in generate_moves(white, black, whose_turn, self.geometry):
+                break
+            move = entry[3]
+            principal_variation.append(move)
+            position_hash = self.zobrist_keys.hash_after_move(position_hash, white, black, move, whose_turn)
+            white, black = make_move(white, black, move, whose_turn)
+            whose_turn = "b" if whose_turn == "w" else "w"
+        return principal_variation
+
+
+def bitboard_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, transposition_table=None,
+                       statistics=None):
+    """This function runs the bitboard alpha-beta search behind the list of strings interface.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        transposition_table: An optional hexapawn_transposition.TranspositionTable. Passing the same table to the
+            successive calls of one game lets each search reuse the positions the previous ones already searched.
+            Without one, searches of AUTO_TABLE_MIN_DEPTH moves or more use a small table of their own.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+
+    Returns: A list of string representing the next best move for the current player, the same one
+        hexapawn.minimax_algorithm returns.
+
+    """
+    if number_moves_ahead == 0:
+        return []
+    if transposition_table is None and number_moves_ahead >= AUTO_TABLE_MIN_DEPTH:
+        transposition_table = hexapawn_transposition.TranspositionTable(AUTO_TABLE_BYTES)
+
+    geometry = get_geometry(board_size)
+    white, black = board_to_bitboards(cur_board)
+    search = BitboardSearch(geometry, transposition_table, statistics)
+    best_move, best_value = search.search_root(white, black, pawn_color, number_moves_ahead)
+    if best_move is None:  # one side has already won
+        return cur_board
+    return bitboards_to_board(*make_move(white, black, best_move, pawn_color), geometry)
+
+
+def tied_moves_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, transposition_table=None,
+                         statistics=None, deadline=None):
+    """This function finds every answer as good as the one bitboard_algorithm returns.
+
+    A cache keyed by a canonical position (see hexapawn_symmetry) stores these, so that the answer of every symmetric
+    image of the position, with its own tie-break, can be given without a new search.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        transposition_table: An optional hexapawn_transposition.TranspositionTable.
+        statistics: An optional hexapawn_statistics.SearchStatistics to count the work of the search in.
+        deadline: An optional time.perf_counter() value after which the search gives up.
+
+    Returns: A list of the answers, in move generator order: [[]] when looking 0 moves ahead, [cur_board] when one
+        side has already won, otherwise the boards reached by every best move. The first one is the answer of
+        bitboard_algorithm. Then the value of the position for the side to move.
+
+    Raises:
+        SearchTimeout: The deadline has passed.
+
+    """
+    geometry = get_geometry(board_size)
+    white, black = board_to_bitboards(cur_board)
+    if number_moves_ahead == 0:
+        return [[]], static_board_evaluation(white, black, pawn_color, geometry)[0]
+    if transposition_table is None and number_moves_ahead >= AUTO_TABLE_MIN_DEPTH:
+        transposition_table = hexapawn_transposition.TranspositionTable(AUTO_TABLE_BYTES)
+
+    search = BitboardSearch(geometry, transposition_table, statistics)
+    search.deadline = deadline
+    best_moves, best_value = search.search_root(white, black, pawn_color, number_moves_ahead, keep_ties=True)
+    if not best_moves:  # one side has already won
+        return [list(cur_board)], best_value
+    return [bitboards_to_board(*make_move(white, black, move, pawn_color), geometry) for move in best_moves], \
+        best_value
+
+
+def iterative_deepening_algorithm(cur_board, board_size, pawn_color, time_budget_ms, max_depth=None,
+                                  transposition_table=None, statistics=None):
+    """This function runs the bitboard search with a time budget instead of a fixed number of moves ahead.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        time_budget_ms: The wall-clock time the search may use, in milliseconds.
+        max_depth: The deepest iteration, by default the longest a game on this board can last.
+        transposition_table: An optional hexapawn_transposition.TranspositionTable, a new one is used otherwise.
+        statistics: An optional hexapawn_statistics.SearchStatistics, with one iteration recorded per depth.
+
+    Returns: A list of string representing the best move found by the deepest completed iteration, the same one
+        hexapawn.minimax_algorithm returns for that depth. If no legal next move, it returns cur_board.
+
+    """
+    geometry = get_geometry(board_size)
+    white, black = board_to_bitboards(cur_board)
+    search = BitboardSearch(geometry, transposition_table, statistics)
+    best_move, best_value, completed_depth = search.iterative_deepening(white, black, pawn_color, time_budget_ms,
+                                                                        max_depth)
+    if best_move is None:  # one side has already won
+        return cur_board
+    return bitboards_to_board(*make_move(white, black, best_move, pawn_color), geometry)
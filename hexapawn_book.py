@@ -0,0 +1,307 @@
+# hexapawn_book.py
+# Persistent position cache and opening book in an SQLite file, kept across process restarts.
+#
+# Each row maps a canonical position (see hexapawn_symmetry) and a depth to the answers of a search of that depth:
+# every move as good as the best one, in the canonical orientation, and the value for the side to move. Storing the
+# tied moves lets one row answer all four symmetric images of a position with the move hexapawn() picks for each.
+#
+# The database runs in write-ahead-log mode, so any number of processes can read while one writes. Every process
+# (and thread) opens its own connection, and writers wait for each other up to a timeout instead of failing.
+#
+#     python hexapawn_book.py book.sqlite --sizes 3 4 5 --depths 4 6 --plies 4 --workers 4
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+import hexapawn_bitboard
+import hexapawn_parallel
+import hexapawn_symmetry
+
+SCHEMA_VERSION = 1
+DEFAULT_TIMEOUT = 30.0  # seconds a writer waits for another one to finish
+DEFAULT_BOOK_PLIES = 4
+BOOK_CHUNK_SIZE = 64  # positions searched by a worker process and written in one transaction at a time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    board TEXT NOT NULL,
+    color TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    moves TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (board, color, depth)
+) WITHOUT ROWID
+"""
+
+
+def board_text(cur_board):
+    """This function packs a board into the text stored in the database.
+
+    Args:
+        cur_board: The n-element list, or a tuple of strings.
+
+    Returns:
+        The rows joined by "/", for example "www/---/bbb".
+    """
+    return "/".join(cur_board)
+
+
+class PositionCache:
+    """An SQLite file of search results, keyed by canonical position, side to move and depth.
+
+    Attributes:
+        path: The path of the database file.
+        read_only: Whether this cache only reads. Read-only caches never take the write lock.
+        timeout: The seconds to wait for the write lock of another process.
+    """
+
+    def __init__(self, path, read_only=False, timeout=DEFAULT_TIMEOUT):
+        self.path = path
+        self.read_only = read_only
+        self.timeout = timeout
+        self._local = threading.local()
+        connection = self._connection()
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0 and not read_only:  # a new file
+            with connection:
+                connection.execute(_SCHEMA)
+                connection.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+        elif version != SCHEMA_VERSION:
+            self.close()
+            raise ValueError("not a hexapawn position cache: " + str(path))
+
+    def _connection(self):
+        """This function returns the connection of the calling thread, opening it on first use.
+
+        A connection is never shared: sqlite3 connections must not cross threads, and a connection inherited by a
+        forked worker process would share the file locks of its parent.
+
+        Returns:
+            A sqlite3.Connection.
+        """
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            if self.read_only:
+                connection = sqlite3.connect("file:%s?mode=ro" % self.path, uri=True, timeout=self.timeout)
+            else:
+                connection = sqlite3.connect(self.path, timeout=self.timeout)
+                connection.execute("PRAGMA journal_mode = WAL")
+                connection.execute("PRAGMA synchronous = NORMAL")  # a crash may lose the last writes, never corrupt
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def close(self):
+        """This function closes the connection of the calling thread."""
+        local = self._local
+        if getattr(local, "pid", None) == os.getpid():
+            local.connection.close()
+        local.pid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def probe(self, canonical_board, canonical_color, number_moves_ahead):
+        """This function looks up a canonical position.
+
+        Args:
+            canonical_board: The canonical board, as returned by hexapawn_symmetry.canonical_position.
+            canonical_color: The side to move in it.
+            number_moves_ahead: The depth of the search.
+
+        Returns:
+            The tied answers, in the canonical orientation, and the value for the side to move, or None if the
+            position is not stored.
+        """
+        row = self._connection().execute("SELECT moves, value FROM positions WHERE board = ? AND color = ? AND "
+                                         "depth = ?", (board_text(canonical_board), canonical_color,
+                                                       number_moves_ahead)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def store_many(self, entries):
+        """This function stores search results in one transaction.
+
+        Args:
+            entries: An iterable of (canonical board, side to move, depth, tied answers, value) tuples.
+        """
+        connection = self._connection()
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?)",
+                                   [(board_text(canonical_board), canonical_color, number_moves_ahead,
+                                     json.dumps(answers), best_value)
+                                    for canonical_board, canonical_color, number_moves_ahead, answers, best_value
+                                    in entries])
+
+    def lookup(self, cur_board, board_size, pawn_color, number_moves_ahead):
+        """This function answers a position from the cache, in the orientation of the caller.
+
+        Args:
+            cur_board: The n-element list.
+            board_size: The size of a square board, or a (rows, columns) pair.
+            pawn_color: The color indicates whose turn to move the pawn.
+            number_moves_ahead: The number indicates how many moves to look ahead.
+
+        Returns:
+            The move hexapawn.hexapawn returns and the value of the position for the side to move, or None if the
+            position is not stored.
+        """
+        canonical_board, canonical_color, transform = hexapawn_symmetry.canonical_position(cur_board, pawn_color)
+        entry = self.probe(canonical_board, canonical_color, number_moves_ahead)
+        if entry is None:
+            return None
+        answers, best_value = entry
+        return hexapawn_symmetry.resolve_move(cur_board, board_size, pawn_color, transform, answers), best_value
+
+    def find_move(self, cur_board, board_size, pawn_color, number_moves_ahead, transposition_table=None,
+                  statistics=None):
+        """This function answers a position from the cache, or searches it and stores the result.
+
+        Args:
+            cur_board: The n-element list.
+            board_size: The size of a square board, or a (rows, columns) pair.
+            pawn_color: The color indicates whose turn to move the pawn.
+            number_moves_ahead: The number indicates how many moves to look ahead.
+            transposition_table: An optional hexapawn_transposition.TranspositionTable for the search.
+            statistics: An optional hexapawn_statistics.SearchStatistics for the search.
+
+        Returns:
+            A list of strings represents the next best move, the same one hexapawn.hexapawn returns.
+        """
+        canonical_board, canonical_color, transform = hexapawn_symmetry.canonical_position(cur_board, pawn_color)
+        entry = self.probe(canonical_board, canonical_color, number_moves_ahead)
+        if entry is None:
+            entry = hexapawn_bitboard.tied_moves_algorithm(list(canonical_board), board_size, canonical_color,
+                                                           number_moves_ahead, transposition_table, statistics)
+            if not self.read_only:
+                self.store_many([(canonical_board, canonical_color, number_moves_ahead) + entry])
+        answers, best_value = entry
+        return hexapawn_symmetry.resolve_move(cur_board, board_size, pawn_color, transform, answers)
+
+
+def opening_positions(board_size, plies):
+    """This function lists the canonical positions reachable from the start of a board within a number of moves.
+
+    Either side may move first, like in hexapawn_tablebase. Positions where the game is over are left out.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+        plies: The number of moves played from the start.
+
+    Returns:
+        A list of (canonical board, side to move) pairs, the positions closest to the start first.
+    """
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    start_board = hexapawn_bitboard.bitboards_to_board(geometry.first_row_mask, geometry.last_row_mask, geometry)
+    seen_positions = set()
+    positions = []
+    frontier = [(start_board, "w"), (start_board, "b")]
+    for ply in range(plies + 1):
+        next_frontier = []
+        for cur_board, whose_turn in frontier:
+            canonical_board, canonical_color, transform = hexapawn_symmetry.canonical_position(cur_board,
+                                                                                                whose_turn)
+            if (canonical_board, canonical_color) in seen_positions:
+                continue
+            seen_positions.add((canonical_board, canonical_color))
+            white, black = hexapawn_bitboard.board_to_bitboards(canonical_board)
+            if hexapawn_bitboard.static_board_evaluation(white, black, canonical_color, geometry)[1]:
+                continue
+            positions.append((canonical_board, canonical_color))
+            next_turn = "b" if canonical_color == "w" else "w"
+            for move in hexapawn_bitboard.generate_moves(white, black, canonical_color, geometry):
+                next_frontier.append((hexapawn_bitboard.bitboards_to_board(
+                    *hexapawn_bitboard.make_move(white, black, move, canonical_color), geometry), next_turn))
+        frontier = next_frontier
+    return positions
+
+
+def search_book_chunk(board_size, number_moves_ahead, positions):
+    """This function searches a chunk of opening positions inside a worker process.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+        number_moves_ahead: The depth of the searches.
+        positions: A list of (canonical board, side to move) pairs.
+
+    Returns:
+        The entries to store, as PositionCache.store_many takes them.
+    """
+    transposition_table = hexapawn_parallel.get_worker_table(board_size)
+    entries = []
+    for canonical_board, canonical_color in positions:
+        answers, best_value = hexapawn_bitboard.tied_moves_algorithm(list(canonical_board), board_size,
+                                                                     canonical_color, number_moves_ahead,
+                                                                     transposition_table)
+        entries.append((canonical_board, canonical_color, number_moves_ahead, answers, best_value))
+    return entries
+
+
+def build_opening_book(path, board_sizes, depths, plies=DEFAULT_BOOK_PLIES, workers=None):
+    """This function searches the opening positions of some boards and stores them in a position cache.
+
+    Positions already in the cache are skipped, so an interrupted build resumes where it stopped. Only this process
+    writes; the worker processes search.
+
+    Args:
+        path: The path of the database file, created if missing.
+        board_sizes: The board sizes, each the size of a square board or a (rows, columns) pair.
+        depths: The search depths to store for every position.
+        plies: The number of moves from the start covered by the book.
+        workers: The number of worker processes, by default the searches run in this process.
+
+    Returns:
+        The number of entries added.
+    """
+    added_entries = 0
+    with PositionCache(path) as position_cache:
+        for board_size in board_sizes:
+            positions = opening_positions(board_size, plies)
+            for number_moves_ahead in depths:
+                missing_positions = [position for position in positions
+                                     if position_cache.probe(position[0], position[1], number_moves_ahead) is None]
+                chunks = [missing_positions[start:start + BOOK_CHUNK_SIZE]
+                          for start in range(0, len(missing_positions), BOOK_CHUNK_SIZE)]
+                if workers is None or workers == 1:
+                    results = (search_book_chunk(board_size, number_moves_ahead, chunk) for chunk in chunks)
+                else:
+                    pool = hexapawn_parallel.get_process_pool(workers)
+                    results = pool.map(search_book_chunk, [board_size] * len(chunks),
+                                       [number_moves_ahead] * len(chunks), chunks)
+                for entries in results:
+                    position_cache.store_many(entries)
+                    added_entries += len(entries)
+    return added_entries
+
+
+def main(argv=None):
+    """This function is the command line tool that builds an opening book."""
+    parser = argparse.ArgumentParser(description="Pre-compute the opening moves of hexapawn into a position cache.")
+    parser.add_argument("path", help="the database file, created if missing")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 5], help="the sizes of square boards")
+    parser.add_argument("--depths", type=int, nargs="+", default=[4], help="the search depths to store")
+    parser.add_argument("--plies", type=int, default=DEFAULT_BOOK_PLIES,
+                        help="the number of moves from the start covered by the book")
+    parser.add_argument("--workers", type=int, help="the number of worker processes")
+    arguments = parser.parse_args(argv)
+    added_entries = build_opening_book(arguments.path, arguments.sizes, arguments.depths, arguments.plies,
+                                       arguments.workers)
+    if arguments.workers is not None and arguments.workers > 1:
+        hexapawn_parallel.shutdown_process_pool()
+    print("added %d entries to %s" % (added_entries, arguments.path))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+# hexapawn_compact.py
+# Compact engine: interned positions and moves, packed into ints, searched without allocating new nodes.
+#
+# A Position is a __slots__ object holding the two bitboards and the side to move, packed into one integer key, and
+# a Move holds its two squares packed into one integer code. A PositionTable interns both: the same position is the
+# same object wherever it appears in the tree, so its static value and its children are computed once and shared by
+# every transposition, and the moves of a board size are created once. A search then allocates nothing per node
+# once the positions it visits are interned.
+#
+# Positions only point to positions further into the game and pawns never move back, so the objects form no
+# reference cycles: reference counting frees them, and the search runs with the cyclic garbage collector paused.
+
+import gc
+
+import hexapawn_bitboard
+import hexapawn_tablebase
+
+
+class Move:
+    """One move of a board size. Moves are interned by their PositionTable, so they compare by identity.
+
+    Attributes:
+        code: from square * number of squares + to square.
+        from_square: The square the pawn leaves, row * cols + col.
+        to_square: The square the pawn moves to.
+    """
+
+    __slots__ = ("code", "from_square", "to_square")
+
+    def __init__(self, code, from_square, to_square):
+        self.code = code
+        self.from_square = from_square
+        self.to_square = to_square
+
+    def __repr__(self):
+        return "Move(%d, %d)" % (self.from_square, self.to_square)
+
+
+class Position:
+    """One position of a board size. Positions are interned by their PositionTable, so they compare by identity.
+
+    Attributes:
+        key: The position packed into one integer, as hexapawn_tablebase.position_key packs it.
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        board_value: The static board value for the side to move.
+        game_over: A boolean value indicates whether the game is over.
+        children: A tuple of (Move, Position) pairs in generator order, or None until the position is expanded.
+    """
+
+    __slots__ = ("key", "white", "black", "whose_turn", "board_value", "game_over", "children")
+
+    def __init__(self, key, white, black, whose_turn, geometry):
+        self.key = key
+        self.white = white
+        self.black = black
+        self.whose_turn = whose_turn
+        self.board_value, self.game_over = hexapawn_bitboard.static_board_evaluation(white, black, whose_turn,
+                                                                                     geometry)
+        self.children = None
+
+    def __repr__(self):
+        return "Position(%#x, %#x, %r)" % (self.white, self.black, self.whose_turn)
+
+
+class PositionTable:
+    """The interned positions and moves of one board size.
+
+    Attributes:
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+        positions: The interned positions by key.
+        moves: The interned moves by code.
+    """
+
+    def __init__(self, board_size):
+        self.geometry = hexapawn_bitboard.get_geometry(board_size)
+        self.positions = {}
+        self.moves = {}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def clear(self):
+        """This function drops the interned positions, keeping the moves."""
+        self.positions.clear()
+
+    def intern_position(self, white, black, whose_turn):
+        """This function returns the one Position object of a position, creating it on first use.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+
+        Returns:
+            A Position.
+        """
+        key = hexapawn_tablebase.position_key(white, black, whose_turn, self.geometry)
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position(key, white, black, whose_turn, self.geometry)
+        return position
+
+    def intern_move(self, move):
+        """This function returns the one Move object of a (from square, to square) tuple, creating it on first use.
+
+        Args:
+            move: A (from square, to square) tuple of hexapawn_bitboard.generate_moves.
+
+        Returns:
+            A Move.
+        """
+        code = move[0] * self.geometry.rows * self.geometry.cols + move[1]
+        interned_move = self.moves.get(code)
+        if interned_move is None:
+            interned_move = self.moves[code] = Move(code, move[0], move[1])
+        return interned_move
+
+    def expand(self, position):
+        """This function returns the children of a position, computing them on the first call only.
+
+        Args:
+            position: A Position of this table, whose game is not over.
+
+        Returns:
+            A tuple of (Move, Position) pairs in hexapawn.move_generator order.
+        """
+        children = position.children
+        if children is None:
+            white, black, whose_turn = position.white, position.black, position.whose_turn
+            next_turn = "b" if whose_turn == "w" else "w"
+            children = position.children = tuple(
+                (self.intern_move(move), self.intern_position(*hexapawn_bitboard.make_move(white, black, move,
+                                                                                             whose_turn), next_turn))
+                for move in hexapawn_bitboard.generate_moves(white, black, whose_turn, self.geometry))
+        return children
+
+
+class CompactSearch:
+    """An alpha-beta search over the interned positions of a PositionTable.
+
+    Attributes:
+        position_table: The PositionTable, which may be kept across the searches of one game.
+        node_count: The number of nodes searched so far.
+    """
+
+    def __init__(self, position_table):
+        self.position_table = position_table
+        self.node_count = 0
+
+    def negamax(self, position, depth, alpha, beta):
+        """This function computes the value of a position with alpha-beta pruning.
+
+        Args:
+            position: A Position.
+            depth: The number of moves left to look ahead.
+            alpha: The value the side to move is already guaranteed.
+            beta: The value the opponent is already guaranteed.
+
+        Returns:
+            The value for the side to move. It is exact if it lies between alpha and beta, otherwise it is a bound.
+        """
+        self.node_count += 1
+        if depth == 0 or position.game_over:
+            return position.board_value
+
+        children = self.position_table.expand(position)
+        win_value = self.position_table.geometry.win_value
+        for move, child in children:
+            if child.game_over:  # a move that ends the game wins it, and no move can do better
+                return win_value
+
+        best_value = -hexapawn_bitboard.INFINITY
+        for move, child in children:
+            value = -self.negamax(child, depth - 1, -beta, -alpha)
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta or value == win_value:
+                        break
+        return best_value
+
+    def search_root(self, position, depth):
+        """This function finds the best move of the side to move.
+
+        The root moves are searched in generator order and a move has to score strictly higher to replace the best
+        one, so the result is the same move hexapawn.minimax_algorithm picks.
+
+        Args:
+            position: A Position.
+            depth: The number of moves to look ahead, at least 1.
+
+        Returns:
+            The best Move and the Position it leads to, or (None, None) if the game is over, and the value for the
+            side to move.
+        """
+        if position.game_over:
+            return None, None, position.board_value
+
+        win_value = self.position_table.geometry.win_value
+        best_move = best_child = None
+        best_value = -hexapawn_bitboard.INFINITY
+        for move, child in self.position_table.expand(position):
+            value = -self.negamax(child, depth - 1, -hexapawn_bitboard.INFINITY, -best_value)
+            if value > best_value:
+                best_move, best_child, best_value = move, child, value
+                if best_value == win_value:  # a later move cannot beat a win
+                    break
+        return best_move, best_child, best_value
+
+
+def compact_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, position_table=None, pause_gc=True):
+    """This function runs the compact search behind the list of strings interface.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        position_table: An optional PositionTable of the board size. Passing the same table to the successive calls
+            of one game reuses the positions and children already interned; by default each call uses a new one.
+        pause_gc: Whether to pause the cyclic garbage collector during the search.
+
+    Returns: A list of string representing the next best move for the current player, the same one
+        hexapawn.minimax_algorithm returns.
+
+    """
+    if number_moves_ahead == 0:
+        return []
+    if position_table is None:
+        position_table = PositionTable(board_size)
+
+    gc_was_enabled = gc.isenabled()
+    if pause_gc:
+        gc.disable()
+    try:
+        white, black = hexapawn_bitboard.board_to_bitboards(cur_board)
+        root = position_table.intern_position(white, black, pawn_color)
+        best_move, best_child, best_value = CompactSearch(position_table).search_root(root, number_moves_ahead)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if best_move is None:  # one side has already won
+        return cur_board
+    return hexapawn_bitboard.bitboards_to_board(best_child.white, best_child.black, position_table.geometry)
@@ -0,0 +1,334 @@
+# hexapawn_incremental.py
+# Incremental make/unmake engine for hexapawn.
+#
+# The whole search works on one mutable IncrementalPosition. A move is applied in place and undone after its subtree
+# is searched, the pawn lists and counts are updated as moves are made instead of rescanning the board, and the moves
+# of a node are yielded lazily, so the siblings cut off by alpha-beta are never generated. The memory in use grows
+# with the depth of the search only, not with the number of children per node.
+
+import hexapawn_bitboard
+
+EMPTY = 0
+WHITE = 1
+BLACK = 2
+
+_PAWN_CODES = {"w": WHITE, "b": BLACK}
+
+
+class IncrementalPosition:
+    """A board that moves are played on and taken back from in place.
+
+    Squares are numbered row * cols + col. Moves are (from square, to square) tuples, as in hexapawn_bitboard.
+
+    Attributes:
+        rows: The number of rows.
+        cols: The number of columns.
+        win_value: The static board value of a won position.
+        squares: A bytearray with EMPTY, WHITE or BLACK for every square.
+        pawns: The squares of the pawns of each color, "w" and "b".
+        pawns_on_goal: The number of pawns of each color that reached the opposite side.
+        whose_turn: A character indicates which side to move this turn.
+    """
+
+    def __init__(self, cur_board, board_size, whose_turn):
+        self.rows, self.cols = hexapawn_bitboard.board_dimensions(board_size)
+        self.win_value = hexapawn_bitboard.get_geometry(board_size).win_value
+        self.squares = bytearray(self.rows * self.cols)
+        self.pawns = {"w": [], "b": []}
+        self.pawns_on_goal = {"w": 0, "b": 0}
+        self.whose_turn = whose_turn
+        self._undo_stack = []
+
+        square = 0
+        for row_idx, row_string in enumerate(cur_board):
+            for cur_square in row_string:
+                if cur_square in _PAWN_CODES:
+                    self.squares[square] = _PAWN_CODES[cur_square]
+                    self.pawns[cur_square].append(square)
+                    if self.is_goal_square(square, cur_square):
+                        self.pawns_on_goal[cur_square] += 1
+                square += 1
+
+    def is_goal_square(self, square, color):
+        """This function checks if a square is on the row a color has to reach.
+
+        Args:
+            square: The square index.
+            color: "w" or "b".
+
+        Returns:
+            A boolean value.
+        """
+        if color == "w":
+            return square // self.cols == self.rows - 1
+        return square < self.cols
+
+    def to_board(self):
+        """This function converts the position to the list of strings representation.
+
+        Returns:
+            The n-element list.
+        """
+        characters = "-wb"
+        return ["".join(characters[code] for code in self.squares[row_idx * self.cols:(row_idx + 1) * self.cols])
+                for row_idx in range(self.rows)]
+
+    def legal_moves(self):
+        """This function yields the valid moves of the side to move, one at a time.
+
+        For each pawn the forward move comes first, then the capture towards column - 1, then the capture towards
+        column + 1. The position may be changed between two moves, as long as it is restored before the next one is
+        requested.
+
+        Yields:
+            (from square, to square) tuples.
+        """
+        squares = self.squares
+        cols = self.cols
+        pawns = self.pawns[self.whose_turn]
+        if self.whose_turn == "w":
+            row_step = cols
+            opponent_code = BLACK
+            beyond_board = self.rows * cols
+        else:
+            row_step = -cols
+            opponent_code = WHITE
+            beyond_board = -1
+        for pawn_index in range(len(pawns)):
+            from_square = pawns[pawn_index]
+            to_square = from_square + row_step
+            if (to_square < beyond_board if row_step > 0 else to_square > beyond_board):
+                col_idx = from_square % cols
+                if squares[to_square] == EMPTY:
+                    yield from_square, to_square
+                if col_idx > 0 and squares[to_square - 1] == opponent_code:
+                    yield from_square, to_square - 1
+                if col_idx < cols - 1 and squares[to_square + 1] == opponent_code:
+                    yield from_square, to_square + 1
+
+    def is_legal(self, move):
+        """This function checks if a move, for example a killer move from a sibling node, is valid here.
+
+        Args:
+            move: A (from square, to square) tuple.
+
+        Returns:
+            A boolean value.
+        """
+        from_square, to_square = move
+        squares = self.squares
+        if self.whose_turn == "w":
+            own_code, opponent_code, row_step = WHITE, BLACK, self.cols
+        else:
+            own_code, opponent_code, row_step = BLACK, WHITE, -self.cols
+        if squares[from_square] != own_code:
+            return False
+        col_step = to_square - from_square - row_step
+        if col_step == 0:
+            return squares[to_square] == EMPTY
+        return abs(col_step) == 1 and squares[to_square] == opponent_code and \
+            to_square // self.cols == (from_square + row_step) // self.cols
+
+    def make_move(self, move):
+        """This function plays a move in place and remembers how to take it back.
+
+        Args:
+            move: A valid (from square, to square) tuple.
+        """
+        from_square, to_square = move
+        mover = self.whose_turn
+        opponent = "b" if mover == "w" else "w"
+        squares = self.squares
+
+        captured_index = -1
+        if squares[to_square] != EMPTY:  # swap-remove the captured pawn
+            opponent_pawns = self.pawns[opponent]
+            captured_index = opponent_pawns.index(to_square)
+            opponent_pawns[captured_index] = opponent_pawns[-1]
+            opponent_pawns.pop()
+            if self.is_goal_square(to_square, opponent):
+                self.pawns_on_goal[opponent] -= 1
+
+        mover_pawns = self.pawns[mover]
+        pawn_index = mover_pawns.index(from_square)
+        mover_pawns[pawn_index] = to_square
+        squares[to_square] = squares[from_square]
+        squares[from_square] = EMPTY
+        if self.is_goal_square(to_square, mover):
+            self.pawns_on_goal[mover] += 1
+
+        self.whose_turn = opponent
+        self._undo_stack.append((from_square, to_square, pawn_index, captured_index))
+
+    def unmake_move(self):
+        """This function takes back the last move played with make_move."""
+        from_square, to_square, pawn_index, captured_index = self._undo_stack.pop()
+        opponent = self.whose_turn
+        mover = "b" if opponent == "w" else "w"
+        squares = self.squares
+
+        if self.is_goal_square(to_square, mover):
+            self.pawns_on_goal[mover] -= 1
+        self.pawns[mover][pawn_index] = from_square
+        squares[from_square] = squares[to_square]
+        squares[to_square] = EMPTY
+
+        if captured_index >= 0:  # put the captured pawn back where swap-remove took it from
+            opponent_pawns = self.pawns[opponent]
+            if captured_index == len(opponent_pawns):
+                opponent_pawns.append(to_square)
+            else:
+                opponent_pawns.append(opponent_pawns[captured_index])
+                opponent_pawns[captured_index] = to_square
+            squares[to_square] = _PAWN_CODES[opponent]
+            if self.is_goal_square(to_square, opponent):
+                self.pawns_on_goal[opponent] += 1
+
+        self.whose_turn = mover
+
+    def static_board_evaluation(self):
+        """This function computes the heuristic value of the position for the side to move.
+
+        It gives the same values as hexapawn_bitboard.static_board_evaluation, from the kept up to date counts, and
+        it stops generating moves as soon as the side to move has one.
+
+        Returns:
+            The static board value and a boolean value indicates whether the game is over.
+        """
+        whose_turn = self.whose_turn
+        win_value = self.win_value
+        if self.pawns_on_goal["b"]:
+            return (win_value if whose_turn == "b" else -win_value), True
+        if self.pawns_on_goal["w"]:
+            return (win_value if whose_turn == "w" else -win_value), True
+        number_of_white = len(self.pawns["w"])
+        number_of_black = len(self.pawns["b"])
+        if number_of_white == 0:
+            return (-win_value if whose_turn == "w" else win_value), True
+        if number_of_black == 0:
+            return (-win_value if whose_turn == "b" else win_value), True
+        for move in self.legal_moves():
+            break
+        else:  # the side to move cannot move
+            return -win_value, True
+        if whose_turn == "w":
+            return number_of_white - number_of_black, False
+        return number_of_black - number_of_white, False
+
+
+class IncrementalSearch:
+    """An alpha-beta search that makes and unmakes moves on one IncrementalPosition.
+
+    Attributes:
+        killer_moves: The most recent cutoff move of each ply, tried first in the sibling nodes.
+    """
+
+    def __init__(self):
+        self.killer_moves = {}
+
+    def ordered_moves(self, position, ply):
+        """This function yields the killer move of the ply first, if it is valid here, then the other moves lazily.
+
+        Args:
+            position: The IncrementalPosition.
+            ply: The number of moves played from the root.
+
+        Yields:
+            (from square, to square) tuples.
+        """
+        killer_move = self.killer_moves.get(ply)
+        if killer_move is not None and position.is_legal(killer_move):
+            yield killer_move
+        for move in position.legal_moves():
+            if move != killer_move:
+                yield move
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        """This function computes the value of the position with alpha-beta pruning.
+
+        Args:
+            position: The IncrementalPosition, left unchanged when the function returns.
+            depth: The number of moves left to look ahead.
+            alpha: The value the side to move is already guaranteed.
+            beta: The value the opponent is already guaranteed.
+            ply: The number of moves played from the root.
+
+        Returns:
+            The value for the side to move. It is exact if it lies between alpha and beta, otherwise it is a bound.
+        """
+        board_value, game_over = position.static_board_evaluation()
+        if depth == 0 or game_over:
+            return board_value
+
+        best_value = -hexapawn_bitboard.INFINITY
+        for move in self.ordered_moves(position, ply):
+            position.make_move(move)
+            value = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake_move()
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self.killer_moves[ply] = move
+                        break
+                if value == position.win_value:  # no other move can do better
+                    break
+        return best_value
+
+    def search_root(self, position, depth):
+        """This function finds the best move of the side to move.
+
+        The root moves are searched in hexapawn.move_generator order and a move has to score strictly higher to
+        replace the best one, so the result is the same move hexapawn.minimax_algorithm picks.
+
+        Args:
+            position: The IncrementalPosition, left unchanged when the function returns.
+            depth: The number of moves to look ahead, at least 1.
+
+        Returns:
+            The best move, or None if the game is over, and its value for the side to move.
+        """
+        board_value, game_over = position.static_board_evaluation()
+        if game_over:
+            return None, board_value
+
+        cols = position.cols
+        # the pawn lists are not kept in row-major order, so sort the root moves back into generator order
+        root_moves = sorted(position.legal_moves(),
+                            key=lambda move: (move[0], (move[0] % cols - move[1] % cols) % 3))
+        best_move = None
+        best_value = -hexapawn_bitboard.INFINITY
+        for move in root_moves:
+            position.make_move(move)
+            value = -self.negamax(position, depth - 1, -hexapawn_bitboard.INFINITY, -best_value, 1)
+            position.unmake_move()
+            if value > best_value:
+                best_move, best_value = move, value
+                if best_value == position.win_value:  # a later move cannot beat a win
+                    break
+        return best_move, best_value
+
+
+def incremental_algorithm(cur_board, board_size, pawn_color, number_moves_ahead):
+    """This function runs the make/unmake search behind the list of strings interface.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+
+    Returns: A list of string representing the next best move for the current player, the same one
+        hexapawn.minimax_algorithm returns.
+
+    """
+    if number_moves_ahead == 0:
+        return []
+
+    position = IncrementalPosition(cur_board, board_size, pawn_color)
+    best_move, best_value = IncrementalSearch().search_root(position, number_moves_ahead)
+    if best_move is None:  # one side has already won
+        return cur_board
+    position.make_move(best_move)
+    return position.to_board()
@@ -0,0 +1,175 @@
+# hexapawn_parallel.py
+# Root-parallel bitboard search on a process pool.
+#
+# The root move searched first (after move ordering) runs alone to get a bound, the way Young Brothers Wait does,
+# then every other root move is searched in parallel against that bound. The worker results are merged with the same
+# tie-breaking as the serial search, so the chosen move is identical.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import hexapawn_bitboard
+import hexapawn_transposition
+
+MIN_PARALLEL_DEPTH = 3  # shallower searches are faster than the round trip to the pool
+
+_process_pool = None
+_process_pool_workers = 0
+
+# per worker process, kept warm between tasks: one transposition table per board size
+_worker_tables = {}
+
+
+def get_process_pool(workers=None):
+    """This function returns the shared process pool, starting it on first use.
+
+    The pool is reused by every later call, so the worker processes and their transposition tables stay warm. Asking
+    for a different number of workers replaces the pool.
+
+    Args:
+        workers: The number of worker processes, by default the number of CPUs.
+
+    Returns:
+        A concurrent.futures.ProcessPoolExecutor.
+    """
+    global _process_pool, _process_pool_workers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if _process_pool is None or _process_pool_workers != workers:
+        shutdown_process_pool()
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+        _process_pool_workers = workers
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """This function stops the shared process pool, if it is running."""
+    global _process_pool, _process_pool_workers
+    if _process_pool is not None:
+        _process_pool.shutdown()
+        _process_pool = None
+        _process_pool_workers = 0
+
+
+def get_worker_table(board_size):
+    """This function returns the transposition table this process keeps for a board size.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+
+    Returns:
+        A hexapawn_transposition.TranspositionTable that lives as long as the process.
+    """
+    dimensions = hexapawn_bitboard.board_dimensions(board_size)
+    table = _worker_tables.get(dimensions)
+    if table is None:
+        table = _worker_tables[dimensions] = hexapawn_transposition.TranspositionTable()
+    return table
+
+
+def search_root_move(white, black, whose_turn, board_size, move, depth, alpha):
+    """This function searches one root move inside a worker process.
+
+    Args:
+        white: The white bitboard before the move.
+        black: The black bitboard before the move.
+        whose_turn: A character indicates which side plays the move.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        move: The root move to search.
+        depth: The number of moves to look ahead from the root.
+        alpha: The value the root player is already guaranteed.
+
+    Returns:
+        The value of the move for the root player. It is exact if it is greater than alpha, otherwise it is an upper
+        bound.
+    """
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    table = get_worker_table(board_size)
+    table.new_search()
+    search = hexapawn_bitboard.BitboardSearch(geometry, table)
+
+    new_white, new_black = hexapawn_bitboard.make_move(white, black, move, whose_turn)
+    next_turn = "b" if whose_turn == "w" else "w"
+    position_hash = search.zobrist_keys.hash_position(new_white, new_black, next_turn)
+    return -search.negamax(new_white, new_black, next_turn, depth - 1, -hexapawn_bitboard.INFINITY, -alpha, 1,
+                           position_hash)
+
+
+def parallel_search_root(white, black, whose_turn, board_size, depth, workers=None):
+    """This function finds the best move by searching the root moves on the process pool.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        depth: The number of moves to look ahead, at least 1.
+        workers: The number of worker processes, by default the number of CPUs.
+
+    Returns:
+        The best move, or None if the game is over, and its value for the side to move. Both are the same as
+        hexapawn_bitboard.BitboardSearch.search_root returns.
+    """
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    search = hexapawn_bitboard.BitboardSearch(geometry)
+    if depth < MIN_PARALLEL_DEPTH or workers == 1:
+        return search.search_root(white, black, whose_turn, depth)
+
+    board_value, game_over = hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, geometry)
+    if game_over:
+        return None, board_value
+
+    moves = hexapawn_bitboard.generate_moves(white, black, whose_turn, geometry)
+    if hexapawn_bitboard.is_mirror_symmetric(white, black, geometry):  # mirrored root moves have the same value
+        moves = hexapawn_bitboard.unique_moves(moves, geometry)
+    ordered_moves = search.order_moves(moves, white, black, whose_turn, 0)
+    pool = get_process_pool(workers)
+
+    # the eldest brother is searched alone to get a bound for the others
+    first_move = ordered_moves[0]
+    first_index = moves.index(first_move)
+    first_value = pool.submit(search_root_move, white, black, whose_turn, board_size, first_move, depth,
+                              -hexapawn_bitboard.INFINITY).result()
+
+    # an earlier move only needs to tie the first value to win, a later move has to beat it
+    futures = []
+    for move in ordered_moves[1:]:
+        move_index = moves.index(move)
+        alpha = first_value - 1 if move_index < first_index else first_value
+        futures.append((move_index, move, alpha,
+                        pool.submit(search_root_move, white, black, whose_turn, board_size, move, depth, alpha)))
+
+    best_move, best_value, best_move_index = first_move, first_value, first_index
+    for move_index, move, alpha, future in futures:
+        value = future.result()
+        if value <= alpha:  # only a bound, the move is worse than the first one
+            continue
+        if value > best_value or (value == best_value and move_index < best_move_index):
+            best_move, best_value, best_move_index = move, value, move_index
+    return best_move, best_value
+
+
+def parallel_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, workers=None):
+    """This function runs the root-parallel search behind the list of strings interface.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        workers: The number of worker processes, by default the number of CPUs.
+
+    Returns: A list of string representing the next best move for the current player, the same one
+        hexapawn.minimax_algorithm returns.
+
+    """
+    if number_moves_ahead == 0:
+        return []
+
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    white, black = hexapawn_bitboard.board_to_bitboards(cur_board)
+    best_move, best_value = parallel_search_root(white, black, pawn_color, board_size, number_moves_ahead, workers)
+    if best_move is None:  # one side has already won
+        return cur_board
+    return hexapawn_bitboard.bitboards_to_board(*hexapawn_bitboard.make_move(white, black, best_move, pawn_color),
+                                                geometry)
@@ -0,0 +1,388 @@
+# hexapawn_perft.py
+# Perft: counting the move paths of the game tree, to check and time the move generators.
+#
+# perft(depth) is the number of leaves of the tree a fixed-depth search visits: the positions depth moves ahead, plus
+# the positions where the game ended sooner, which are not expanded. Every move generator of the repo must give the
+# same counts as hexapawn.move_generator, position for position; compare_generators finds the first position where
+# one does not.
+#
+#     python hexapawn_perft.py 5 6 --divide
+#     python hexapawn_perft.py 5 6 --compare bitboard incremental vectorized
+#     python hexapawn_perft.py 8 5 --time --generator bitboard
+
+import argparse
+import sys
+import time
+
+import hexapawn
+import hexapawn_bitboard
+import hexapawn_incremental
+import hexapawn_vectorized
+
+
+class PerftGenerator:
+    """A move generator that perft can run.
+
+    Attributes:
+        name: The name of the generator in PERFT_GENERATORS.
+        children: A function (board, board_size, color) returning the boards, as tuples of strings, that the moves
+            of the side to move lead to, or an empty list if the game is over.
+        count: A function (board, board_size, color, depth) returning the number of leaves and the number of moves
+            generated below the position.
+    """
+
+    def __init__(self, name, children, count):
+        self.name = name
+        self.children = children
+        self.count = count
+
+
+PERFT_GENERATORS = {}
+
+
+def register_generator(name, children, count):
+    """This function makes a move generator available to perft, divide and compare_generators.
+
+    Args:
+        name: The name to select the generator by.
+        children: See PerftGenerator.children.
+        count: See PerftGenerator.count.
+    """
+    PERFT_GENERATORS[name] = PerftGenerator(name, children, count)
+
+
+def check_depth(depth, minimum_depth=0):
+    """This function rejects a depth the counts cannot stop at.
+
+    The count functions only stop at depth 0, so a negative depth would count the whole game tree.
+
+    Args:
+        depth: The number of moves to look ahead.
+        minimum_depth: The smallest depth allowed.
+
+    Raises:
+        ValueError: The depth is below the minimum.
+    """
+    if depth < minimum_depth:
+        raise ValueError("depth must be at least %d, got %d" % (minimum_depth, depth))
+
+
+def reference_game_over(cur_board, number_of_white, number_of_black, pawn_codes, whose_turn):
+    """This function applies the end of game rules of hexapawn.static_board_evaluation.
+
+    Args:
+        cur_board: The n-element list.
+        number_of_white: The total number of white pawns.
+        number_of_black: The total number of black pawns.
+        pawn_codes: A list contains all pawn codes.
+        whose_turn: A character indicates which side to move this turn.
+
+    Returns:
+        A boolean value.
+    """
+    return "b" in cur_board[0] or "w" in cur_board[-1] or number_of_white == 0 or number_of_black == 0 or \
+        not hexapawn.if_can_move(cur_board, pawn_codes, whose_turn)
+
+
+def reference_children(cur_board, board_size, whose_turn):
+    """This function is the PerftGenerator.children of hexapawn.move_generator."""
+    pawn_codes, number_of_white, number_of_black = hexapawn.locate_pawns(cur_board)
+    if reference_game_over(cur_board, number_of_white, number_of_black, pawn_codes, whose_turn):
+        return []
+    return [tuple(new_board) for new_board in hexapawn.move_generator(cur_board, board_size, whose_turn, pawn_codes)]
+
+
+def reference_count(cur_board, board_size, whose_turn, depth):
+    """This function is the PerftGenerator.count of hexapawn.move_generator."""
+    if depth == 0:
+        return 1, 0
+    pawn_codes, number_of_white, number_of_black = hexapawn.locate_pawns(cur_board)
+    if reference_game_over(cur_board, number_of_white, number_of_black, pawn_codes, whose_turn):
+        return 1, 0
+
+    new_boards = hexapawn.move_generator(cur_board, board_size, whose_turn, pawn_codes)
+    next_turn = "b" if whose_turn == "w" else "w"
+    leaf_count, move_count = 0, len(new_boards)
+    for new_board in new_boards:
+        child_leaves, child_moves = reference_count(new_board, board_size, next_turn, depth - 1)
+        leaf_count += child_leaves
+        move_count += child_moves
+    return leaf_count, move_count
+
+
+def bitboard_children(cur_board, board_size, whose_turn):
+    """This function is the PerftGenerator.children of hexapawn_bitboard.generate_moves."""
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    white, black = hexapawn_bitboard.board_to_bitboards(cur_board)
+    if hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, geometry)[1]:
+        return []
+    return [tuple(hexapawn_bitboard.bitboards_to_board(
+        *hexapawn_bitboard.make_move(white, black, move, whose_turn), geometry))
+        for move in hexapawn_bitboard.generate_moves(white, black, whose_turn, geometry)]
+
+
+def bitboard_count(cur_board, board_size, whose_turn, depth):
+    """This function is the PerftGenerator.count of hexapawn_bitboard.generate_moves."""
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    white, black = hexapawn_bitboard.board_to_bitboards(cur_board)
+    return bitboard_count_bitboards(white, black, whose_turn, depth, geometry)
+
+
+def bitboard_count_bitboards(white, black, whose_turn, depth, geometry):
+    """This function counts the leaves and the moves generated below a bitboard position."""
+    if depth == 0 or hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, geometry)[1]:
+        return 1, 0
+
+    moves = hexapawn_bitboard.generate_moves(white, black, whose_turn, geometry)
+    next_turn = "b" if whose_turn == "w" else "w"
+    leaf_count, move_count = 0, len(moves)
+    for move in moves:
+        new_white, new_black = hexapawn_bitboard.make_move(white, black, move, whose_turn)
+        child_leaves, child_moves = bitboard_count_bitboards(new_white, new_black, next_turn, depth - 1, geometry)
+        leaf_count += child_leaves
+        move_count += child_moves
+    return leaf_count, move_count
+
+
+def incremental_children(cur_board, board_size, whose_turn):
+    """This function is the PerftGenerator.children of hexapawn_incremental.IncrementalPosition.legal_moves."""
+    position = hexapawn_incremental.IncrementalPosition(cur_board, board_size, whose_turn)
+    if position.static_board_evaluation()[1]:
+        return []
+    new_boards = []
+    for move in list(position.legal_moves()):
+        position.make_move(move)
+        new_boards.append(tuple(position.to_board()))
+        position.unmake_move()
+    return new_boards
+
+
+def incremental_count(cur_board, board_size, whose_turn, depth):
+    """This function is the PerftGenerator.count of hexapawn_incremental.IncrementalPosition.legal_moves."""
+    position = hexapawn_incremental.IncrementalPosition(cur_board, board_size, whose_turn)
+    return incremental_count_position(position, depth)
+
+
+def incremental_count_position(position, depth):
+    """This function counts the leaves and the moves generated below a position, restoring it afterwards."""
+    if depth == 0 or position.static_board_evaluation()[1]:
+        return 1, 0
+
+    leaf_count, move_count = 0, 0
+    for move in position.legal_moves():
+        position.make_move(move)
+        child_leaves, child_moves = incremental_count_position(position, depth - 1)
+        position.unmake_move()
+        leaf_count += child_leaves
+        move_count += child_moves + 1
+    return leaf_count, move_count
+
+
+def vectorized_children(cur_board, board_size, whose_turn):
+    """This function is the PerftGenerator.children of hexapawn_vectorized.expand."""
+    tensor = hexapawn_vectorized.boards_to_tensor([cur_board], board_size)
+    if hexapawn_vectorized.static_board_evaluation(tensor, whose_turn, 1)[1][0]:
+        return []
+    children, parent_indices = hexapawn_vectorized.expand(tensor, whose_turn)
+    return [tuple(new_board) for new_board in hexapawn_vectorized.tensor_to_boards(children)]
+
+
+def vectorized_count(cur_board, board_size, whose_turn, depth):
+    """This function is the PerftGenerator.count of hexapawn_vectorized.expand."""
+    return hexapawn_vectorized.count_leaves(hexapawn_vectorized.boards_to_tensor([cur_board], board_size), whose_turn,
+                                            depth)
+
+
+register_generator("reference", reference_children, reference_count)
+register_generator("bitboard", bitboard_children, bitboard_count)
+register_generator("incremental", incremental_children, incremental_count)
+if hexapawn_vectorized.numpy is not None:
+    register_generator("vectorized", vectorized_children, vectorized_count)
+
+
+def perft(cur_board, board_size, pawn_color, depth, generator="reference"):
+    """This function counts the leaves of the game tree depth moves deep.
+
+    Args:
+        cur_board: The n-element list.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        depth: The number of moves to look ahead.
+        generator: The name of the move generator in PERFT_GENERATORS.
+
+    Returns:
+        The number of leaves. A position where the game is over counts as one leaf and is not expanded.
+
+    Raises:
+        ValueError: The depth is negative.
+    """
+    check_depth(depth)
+    return PERFT_GENERATORS[generator].count(cur_board, board_size, pawn_color, depth)[0]
+
+
+def divide(cur_board, board_size, pawn_color, depth, generator="reference"):
+    """This function splits the perft count of a position by root move.
+
+    Args:
+        cur_board: The n-element list.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        depth: The number of moves to look ahead, at least 1.
+        generator: The name of the move generator in PERFT_GENERATORS.
+
+    Returns:
+        A dictionary from the board each root move leads to, a tuple of strings, to the number of leaves below it.
+        It is empty if the game is over.
+
+    Raises:
+        ValueError: The depth is below 1.
+    """
+    check_depth(depth, 1)
+    perft_generator = PERFT_GENERATORS[generator]
+    next_turn = "b" if pawn_color == "w" else "w"
+    return {new_board: perft_generator.count(list(new_board), board_size, next_turn, depth - 1)[0]
+            for new_board in perft_generator.children(cur_board, board_size, pawn_color)}
+
+
+def compare_generators(cur_board, board_size, pawn_color, depth, generator, reference="reference"):
+    """This function checks a move generator against the reference one, node for node.
+
+    Where the divide counts differ, it descends into the first root move that differs, until it reaches the
+    position whose moves are generated differently.
+
+    Args:
+        cur_board: The n-element list.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        depth: The number of moves to look ahead.
+        generator: The name of the move generator to check.
+        reference: The name of the move generator taken as correct.
+
+    Returns:
+        None if both generators agree. Otherwise a dictionary with the "path" of boards from the root to the position
+        where they disagree, its "color" to move, the "depth" left, and the "missing" and "extra" boards the checked
+        generator leaves out or adds there. Both lists are empty if the moves agree but the count function of the
+        generator does not match its children function.
+
+    Raises:
+        ValueError: The depth is negative.
+    """
+    check_depth(depth)
+    path = [tuple(cur_board)]
+    whose_turn = pawn_color
+    while True:
+        reference_counts = divide(list(path[-1]), board_size, whose_turn, depth, reference) if depth else {}
+        generator_counts = divide(list(path[-1]), board_size, whose_turn, depth, generator) if depth else {}
+        missing = sorted(set(reference_counts) - set(generator_counts))
+        extra = sorted(set(generator_counts) - set(reference_counts))
+        if missing or extra:
+            return {"path": path, "color": whose_turn, "depth": depth, "missing": missing, "extra": extra}
+
+        differing_boards = [new_board for new_board in reference_counts
+                            if reference_counts[new_board] != generator_counts[new_board]]
+        if not differing_boards:
+            if perft(list(path[-1]), board_size, whose_turn, depth, reference) != \
+                    perft(list(path[-1]), board_size, whose_turn, depth, generator):
+                return {"path": path, "color": whose_turn, "depth": depth, "missing": [], "extra": []}
+            return None
+        path.append(differing_boards[0])
+        whose_turn = "b" if whose_turn == "w" else "w"
+        depth -= 1
+
+
+def time_generator(cur_board, board_size, pawn_color, depth, generator="reference"):
+    """This function measures the move generation throughput of a generator.
+
+    Args:
+        cur_board: The n-element list.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        depth: The number of moves to look ahead.
+        generator: The name of the move generator in PERFT_GENERATORS.
+
+    Returns:
+        A dictionary with the leaves, the moves generated, the seconds taken and the moves generated per second.
+
+    Raises:
+        ValueError: The depth is negative.
+    """
+    check_depth(depth)
+    started_at = time.perf_counter()
+    leaf_count, move_count = PERFT_GENERATORS[generator].count(cur_board, board_size, pawn_color, depth)
+    elapsed_seconds = time.perf_counter() - started_at
+    return {
+        "generator": generator,
+        "leaves": leaf_count,
+        "moves": move_count,
+        "seconds": elapsed_seconds,
+        "moves_per_second": move_count / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    """This function is the command line tool for perft, divide, compare and timing runs."""
+    parser = argparse.ArgumentParser(description="Count the move paths of a hexapawn position.")
+    parser.add_argument("size", type=int, help="the size of the board, used with --cols for rectangular boards")
+    parser.add_argument("depth", type=int, help="the number of moves to look ahead")
+    parser.add_argument("--cols", type=int, help="the number of columns, by default the same as the size")
+    parser.add_argument("--board", help='the rows of the position separated by "/", for example "w-w/-w-/bbb", by '
+                                         'default the starting position')
+    parser.add_argument("--color", default="w", choices="wb", help="the side to move")
+    parser.add_argument("--generator", default="reference", choices=sorted(PERFT_GENERATORS),
+                        help="the move generator to count with")
+    parser.add_argument("--divide", action="store_true", help="split the count by root move")
+    parser.add_argument("--compare", nargs="+", choices=sorted(PERFT_GENERATORS),
+                        help="check these generators against --generator")
+    parser.add_argument("--time", action="store_true", help="report the moves generated per second")
+    arguments = parser.parse_args(argv)
+
+    if arguments.depth < 0:
+        parser.error("depth must be 0 or more")
+    if arguments.divide and arguments.depth == 0:
+        parser.error("--divide needs a depth of at least 1")
+    cols = arguments.cols or arguments.size
+    board_size = (arguments.size, cols)
+    if arguments.board is None:
+        cur_board = ["w" * cols] + ["-" * cols] * (arguments.size - 2) + ["b" * cols]
+    else:
+        cur_board = arguments.board.split("/")
+        if len(cur_board) != arguments.size or any(len(row_string) != cols for row_string in cur_board):
+            parser.error("--board must have %d rows of %d squares" % (arguments.size, cols))
+        if any(square not in "wb-" for row_string in cur_board for square in row_string):
+            parser.error('--board squares must be "w", "b" or "-"')
+
+    if arguments.compare:
+        disagreements = 0
+        for generator in arguments.compare:
+            difference = compare_generators(cur_board, board_size, arguments.color, arguments.depth, generator,
+                                            arguments.generator)
+            if difference is None:
+                print("%s: agrees with %s" % (generator, arguments.generator))
+                continue
+            disagreements += 1
+            print("%s: differs from %s after %d moves, %s to move, depth %d left" % (
+                generator, arguments.generator, len(difference["path"]) - 1, difference["color"],
+                difference["depth"]))
+            print("    position: %s" % "/".join(difference["path"][-1]))
+            for new_board in difference["missing"]:
+                print("    missing:  %s" % "/".join(new_board))
+            for new_board in difference["extra"]:
+                print("    extra:    %s" % "/".join(new_board))
+        return 1 if disagreements else 0
+
+    if arguments.divide:
+        counts = divide(cur_board, board_size, arguments.color, arguments.depth, arguments.generator)
+        for new_board, leaf_count in counts.items():
+            print("%s: %d" % ("/".join(new_board), leaf_count))
+        print("total: %d" % sum(counts.values()))
+    elif arguments.time:
+        result = time_generator(cur_board, board_size, arguments.color, arguments.depth, arguments.generator)
+        print("%(generator)s: %(leaves)d leaves, %(moves)d moves in %(seconds).3f s, %(moves_per_second).0f moves/s"
+              % result)
+    else:
+        print(perft(cur_board, board_size, arguments.color, arguments.depth, arguments.generator))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
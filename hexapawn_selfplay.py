@@ -0,0 +1,409 @@
+# hexapawn_selfplay.py
+# Self-play: many full games between two configurable bitboard searchers, streamed to a file as they finish.
+#
+# A searcher looks a fixed number of moves ahead or searches with a time budget per move, and can break ties between
+# equally good moves at random. The random choices of a game only depend on the seed and the game index, so fixed
+# depth games replay identically whatever the number of worker processes.
+#
+# Each process keeps one BitboardSearch per searcher alive across moves and games, so the transposition table, the
+# history scores and the principal variation found for the previous move stay warm. With workers, chunks of games
+# are played on the process pool of hexapawn_parallel and written back in game order, with only a few chunks in
+# flight at a time.
+#
+# Records are written as JSON lines, or in a compact binary layout, little-endian:
+#     file header (8 bytes): magic, version, rows, cols
+#     game header (8 bytes): game index, first color, winner, number of moves
+#     moves (5 bytes each): from square, to square, value for the side that moved, depth searched
+# Squares are bitboard square indices, row * cols + col. read_records reads both formats back.
+#
+#     python hexapawn_selfplay.py games.jsonl --games 1000 --size 4 --white depth=4,random --black time=20 --workers 4
+
+import argparse
+import json
+import random
+import struct
+import sys
+import time
+from collections import deque
+
+import hexapawn_bitboard
+import hexapawn_parallel
+
+DEFAULT_GAMES_PER_CHUNK = 16  # games sent to a worker process at a time
+
+_MAGIC = b"HXSP"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<4sHBB")
+_GAME_HEADER = struct.Struct("<IBBH")
+_MOVE = struct.Struct("<BBhB")
+_COLOR_CODES = {"w": 0, "b": 1}
+_COLORS = "wb"
+
+# per process, kept warm between moves and games: one BitboardSearch per (board dimensions, color, searcher)
+_searches = {}
+
+
+class SearcherConfig:
+    """The settings of one side in self-play.
+
+    Attributes:
+        depth: The number of moves to look ahead. With a time budget, the deepest iteration instead (None for no
+            limit).
+        time_budget_ms: The wall-clock time of each move in milliseconds, or None to search depth moves ahead.
+        random_ties: Whether to pick at random among the moves as good as the best one, instead of the first one in
+            generator order like hexapawn.hexapawn.
+    """
+
+    def __init__(self, depth=None, time_budget_ms=None, random_ties=False):
+        if time_budget_ms is None and (depth is None or depth < 1):
+            raise ValueError("a searcher needs a depth of at least 1 or a time budget")
+        self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.random_ties = random_ties
+
+    def __repr__(self):
+        settings = []
+        if self.depth is not None:
+            settings.append("depth=%d" % self.depth)
+        if self.time_budget_ms is not None:
+            settings.append("time=%g" % self.time_budget_ms)
+        if self.random_ties:
+            settings.append("random")
+        return ",".join(settings)
+
+    def __eq__(self, other):
+        return isinstance(other, SearcherConfig) and repr(self) == repr(other)
+
+    def __hash__(self):
+        return hash(repr(self))
+
+
+def parse_searcher(text):
+    """This function reads a searcher from its command line form, for example "depth=4,random" or "time=50".
+
+    Args:
+        text: Comma-separated settings: depth=N, time=MILLISECONDS and random.
+
+    Returns:
+        A SearcherConfig.
+    """
+    depth = None
+    time_budget_ms = None
+    random_ties = False
+    for setting in text.split(","):
+        name, _, value = setting.strip().partition("=")
+        if name == "depth":
+            depth = int(value)
+        elif name == "time":
+            time_budget_ms = float(value)
+        elif name == "random" and not value:
+            random_ties = True
+        else:
+            raise ValueError("unknown searcher setting: " + setting)
+    return SearcherConfig(depth, time_budget_ms, random_ties)
+
+
+def get_search(geometry, pawn_color, searcher):
+    """This function returns the search this process keeps for one side of a board size.
+
+    Args:
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+        pawn_color: The side the searcher plays.
+        searcher: A SearcherConfig.
+
+    Returns:
+        A hexapawn_bitboard.BitboardSearch that lives as long as the process. The searches of a board size share
+        the transposition table of hexapawn_parallel.get_worker_table.
+    """
+    key = (geometry.rows, geometry.cols, pawn_color, searcher)
+    search = _searches.get(key)
+    if search is None:
+        search = _searches[key] = hexapawn_bitboard.BitboardSearch(
+            geometry, hexapawn_parallel.get_worker_table((geometry.rows, geometry.cols)))
+    return search
+
+
+def advance_search(search, played_moves):
+    """This function moves the heuristics of a search forward by the moves played since its last search.
+
+    If the game followed the principal variation, the rest of it is searched first at the next move; otherwise it is
+    dropped. The killer moves of each ply move up by as many plies.
+
+    Args:
+        search: A hexapawn_bitboard.BitboardSearch.
+        played_moves: The moves played since the search last returned a move, its own move first.
+    """
+    number_of_moves = len(played_moves)
+    if search.principal_variation[:number_of_moves] == played_moves:
+        search.principal_variation = search.principal_variation[number_of_moves:]
+    else:
+        search.principal_variation = []
+    search.killer_moves = {ply - number_of_moves: moves for ply, moves in search.killer_moves.items()
+                           if ply >= number_of_moves}
+
+
+def choose_move(search, white, black, whose_turn, searcher, random_generator):
+    """This function searches one position of a game.
+
+    Args:
+        search: The hexapawn_bitboard.BitboardSearch of the side to move.
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        searcher: The SearcherConfig of the side to move.
+        random_generator: The random.Random of the game, used to break ties.
+
+    Returns:
+        The move, None if the game is over, its value for the side to move and the depth searched.
+    """
+    if searcher.time_budget_ms is None:
+        depth = searcher.depth
+        if searcher.random_ties:
+            best_moves, best_value = search.search_root(white, black, whose_turn, depth, keep_ties=True)
+            return (random_generator.choice(best_moves) if best_moves else None), best_value, depth
+        best_move, best_value = search.search_root(white, black, whose_turn, depth)
+        return best_move, best_value, depth
+
+    best_move, best_value, depth = search.iterative_deepening(white, black, whose_turn, searcher.time_budget_ms,
+                                                              searcher.depth)
+    if searcher.random_ties and best_move is not None:
+        # the completed iteration is in the transposition table, so finding its ties is cheap
+        best_moves, best_value = search.search_root(white, black, whose_turn, depth, keep_ties=True)
+        best_move = random_generator.choice(best_moves)
+    return best_move, best_value, depth
+
+
+def play_game(board_size, white_searcher, black_searcher, seed, game_index, first_color="w"):
+    """This function plays one game from the starting position.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+        white_searcher: The SearcherConfig of white.
+        black_searcher: The SearcherConfig of black.
+        seed: The seed of the run.
+        game_index: The number of the game in the run, which picks its random choices.
+        first_color: The side that moves first.
+
+    Returns:
+        A (game index, first color, moves, values, depths, winner) record: the moves as (from square, to square)
+        tuples, the value of each for the side that played it, the depth each was searched to, and "w" or "b".
+    """
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    searchers = {"w": white_searcher, "b": black_searcher}
+    searches = {pawn_color: get_search(geometry, pawn_color, searchers[pawn_color]) for pawn_color in "wb"}
+    random_generator = random.Random("%d:%d" % (seed, game_index))
+    white, black = geometry.first_row_mask, geometry.last_row_mask
+    whose_turn = first_color
+    moves, values, depths = [], [], []
+    moves_since_search = {"w": None, "b": None}  # None before the first search of the game
+    while True:
+        search = searches[whose_turn]
+        if moves_since_search[whose_turn] is not None:
+            advance_search(search, moves_since_search[whose_turn])
+        else:
+            search.principal_variation = []
+            search.killer_moves = {}
+        move, value, depth = choose_move(search, white, black, whose_turn, searchers[whose_turn], random_generator)
+        if move is None:
+            break
+        moves.append(move)
+        values.append(value)
+        depths.append(depth)
+        moves_since_search[whose_turn] = [move]
+        if moves_since_search["w" if whose_turn == "b" else "b"] is not None:
+            moves_since_search["w" if whose_turn == "b" else "b"].append(move)
+        white, black = hexapawn_bitboard.make_move(white, black, move, whose_turn)
+        whose_turn = "b" if whose_turn == "w" else "w"
+
+    board_value = hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, geometry)[0]
+    if board_value > 0:
+        winner = whose_turn
+    else:
+        winner = "b" if whose_turn == "w" else "w"
+    return game_index, first_color, moves, values, depths, winner
+
+
+def play_game_chunk(board_size, white_searcher, black_searcher, seed, game_indices, first_color="w"):
+    """This function plays a chunk of games inside a worker process.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+        white_searcher: The SearcherConfig of white.
+        black_searcher: The SearcherConfig of black.
+        seed: The seed of the run.
+        game_indices: The numbers of the games to play.
+        first_color: The side that moves first.
+
+    Returns:
+        The list of play_game records, in the same order.
+    """
+    return [play_game(board_size, white_searcher, black_searcher, seed, game_index, first_color)
+            for game_index in game_indices]
+
+
+def generate_games(board_size, white_searcher, black_searcher, number_of_games, seed=0, first_color="w",
+                   workers=None, games_per_chunk=DEFAULT_GAMES_PER_CHUNK):
+    """This function plays many games and streams the records back in game order.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair.
+        white_searcher: The SearcherConfig of white.
+        black_searcher: The SearcherConfig of black.
+        number_of_games: The number of games to play.
+        seed: The seed of the random tie-breaks.
+        first_color: The side that moves first.
+        workers: The number of worker processes. None or 1 plays in this process.
+        games_per_chunk: The number of games sent to a worker at a time.
+
+    Yields:
+        The play_game record of each game.
+    """
+    if workers is None or workers == 1:
+        for game_index in range(number_of_games):
+            yield play_game(board_size, white_searcher, black_searcher, seed, game_index, first_color)
+        return
+
+    pool = hexapawn_parallel.get_process_pool(workers)
+    chunk_starts = iter(range(0, number_of_games, games_per_chunk))
+    pending_chunks = deque()
+    while True:
+        # keep two chunks per worker in flight so the workers never wait for the writer
+        while len(pending_chunks) < 2 * workers:
+            chunk_start = next(chunk_starts, None)
+            if chunk_start is None:
+                break
+            game_indices = range(chunk_start, min(chunk_start + games_per_chunk, number_of_games))
+            pending_chunks.append(pool.submit(play_game_chunk, board_size, white_searcher, black_searcher, seed,
+                                              game_indices, first_color))
+        if not pending_chunks:
+            return
+        yield from pending_chunks.popleft().result()
+
+
+def encode_json_record(record, geometry):
+    """This function turns a game record into one line of JSON.
+
+    Args:
+        record: A play_game record.
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+
+    Returns:
+        The line as bytes, newline included.
+    """
+    game_index, first_color, moves, values, depths, winner = record
+    return (json.dumps({"game": game_index, "size": [geometry.rows, geometry.cols], "first": first_color,
+                        "moves": [list(move) for move in moves], "values": values, "depths": depths,
+                        "winner": winner}, separators=(",", ":")) + "\n").encode()
+
+
+def encode_binary_record(record):
+    """This function packs a game record in the binary layout.
+
+    Args:
+        record: A play_game record.
+
+    Returns:
+        The game header followed by the moves, as bytes.
+    """
+    game_index, first_color, moves, values, depths, winner = record
+    parts = [_GAME_HEADER.pack(game_index, _COLOR_CODES[first_color], _COLOR_CODES[winner], len(moves))]
+    for move, value, depth in zip(moves, values, depths):
+        parts.append(_MOVE.pack(move[0], move[1], value, depth))
+    return b"".join(parts)
+
+
+def write_games(path, records, board_size, binary=False):
+    """This function writes game records to a file as they arrive, keeping none of them in memory.
+
+    Args:
+        path: The path of the file, overwritten if it exists.
+        records: An iterable of play_game records, for example generate_games.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        binary: Whether to use the binary layout instead of JSON lines.
+
+    Returns:
+        The number of games and the number of moves written.
+    """
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    if binary and geometry.rows * geometry.cols > 256:
+        raise ValueError("the binary layout holds boards of up to 256 squares")
+    number_of_games = 0
+    number_of_moves = 0
+    with open(path, "wb") as records_file:
+        if binary:
+            records_file.write(_FILE_HEADER.pack(_MAGIC, _VERSION, geometry.rows, geometry.cols))
+        for record in records:
+            if binary:
+                records_file.write(encode_binary_record(record))
+            else:
+                records_file.write(encode_json_record(record, geometry))
+            number_of_games += 1
+            number_of_moves += len(record[2])
+    return number_of_games, number_of_moves
+
+
+def read_records(path):
+    """This function reads back the games written by write_games, in either layout.
+
+    Args:
+        path: The path of the file.
+
+    Yields:
+        A dictionary per game, with the keys of the JSON lines layout.
+    """
+    with open(path, "rb") as records_file:
+        file_header = records_file.read(_FILE_HEADER.size)
+        if file_header[:len(_MAGIC)] != _MAGIC:
+            records_file.seek(0)
+            for line in records_file:
+                yield json.loads(line)
+            return
+        magic, version, rows, cols = _FILE_HEADER.unpack(file_header)
+        if version != _VERSION:
+            raise ValueError("unsupported self-play file version: %d" % version)
+        while True:
+            game_header = records_file.read(_GAME_HEADER.size)
+            if not game_header:
+                return
+            game_index, first_code, winner_code, number_of_moves = _GAME_HEADER.unpack(game_header)
+            moves, values, depths = [], [], []
+            for from_square, to_square, value, depth in _MOVE.iter_unpack(
+                    records_file.read(_MOVE.size * number_of_moves)):
+                moves.append([from_square, to_square])
+                values.append(value)
+                depths.append(depth)
+            yield {"game": game_index, "size": [rows, cols], "first": _COLORS[first_code], "moves": moves,
+                   "values": values, "depths": depths, "winner": _COLORS[winner_code]}
+
+
+def main(argv=None):
+    """This function is the command line tool that generates a self-play data set."""
+    parser = argparse.ArgumentParser(description="Play hexapawn games between two searchers and record them.")
+    parser.add_argument("path", help="the file to write the games to")
+    parser.add_argument("--games", type=int, default=100, help="the number of games to play")
+    parser.add_argument("--size", type=int, default=4, help="the size of the square board")
+    parser.add_argument("--white", type=parse_searcher, default=SearcherConfig(4),
+                        help="the white searcher, for example depth=4,random or time=50 (milliseconds per move)")
+    parser.add_argument("--black", type=parse_searcher, default=SearcherConfig(4), help="the black searcher")
+    parser.add_argument("--first", choices=("w", "b"), default="w", help="the side that moves first")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random tie-breaks")
+    parser.add_argument("--binary", action="store_true", help="write the binary layout instead of JSON lines")
+    parser.add_argument("--workers", type=int, help="the number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_GAMES_PER_CHUNK,
+                        help="the number of games sent to a worker at a time")
+    arguments = parser.parse_args(argv)
+
+    started_at = time.perf_counter()
+    records = generate_games(arguments.size, arguments.white, arguments.black, arguments.games, arguments.seed,
+                             arguments.first, arguments.workers, arguments.chunk_size)
+    number_of_games, number_of_moves = write_games(arguments.path, records, arguments.size, arguments.binary)
+    elapsed = time.perf_counter() - started_at
+    if arguments.workers is not None and arguments.workers > 1:
+        hexapawn_parallel.shutdown_process_pool()
+    print("%d games, %d moves in %.2f s: %.1f games/s, %.0f moves/s" % (
+        number_of_games, number_of_moves, elapsed, number_of_games / elapsed, number_of_moves / elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+# hexapawn_server.py
+# Asyncio HTTP/JSON front end: searches run on the process pool of hexapawn_parallel, the event loop only does I/O.
+#
+# Identical or symmetric requests in flight at the same time are searched once and all get the result. Searches
+# wait in a bounded queue; when it is full the server answers 503 at once instead of piling up work. Every request
+# has a deadline, after which it gets a 504; the worker process searching it gives up at the same time, so a search
+# too deep for its deadline never holds a worker. Requests deeper than a maximum depth are turned away with a 400.
+#
+#     python hexapawn_server.py --port 8765 --workers 4
+#     curl -d '{"board": ["www", "---", "bbb"], "board_size": 3, "color": "w", "depth": 4}' localhost:8765/move
+#
+# POST /move takes the arguments of hexapawn.hexapawn as JSON ("deadline_ms" is optional) and answers
+# {"move": [...]}. GET /health answers with the number of searches queued and in flight.
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+
+import hexapawn_batch
+import hexapawn_bitboard
+import hexapawn_parallel
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 256  # searches waiting for a worker, beyond that requests are turned away
+DEFAULT_DEADLINE_MS = 10000
+DEFAULT_MAX_DEPTH = 24  # deeper requests are turned away
+MAX_BODY_BYTES = 1 << 20
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+def is_integer(value):
+    """This function checks if a JSON value is an integer, true and false excluded.
+
+    Args:
+        value: A decoded JSON value.
+
+    Returns:
+        A boolean value.
+    """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_move_request(payload, max_depth=DEFAULT_MAX_DEPTH):
+    """This function checks the JSON body of a move request.
+
+    Args:
+        payload: The decoded JSON body.
+        max_depth: The deepest search a request may ask for.
+
+    Returns:
+        The request key and transform (see hexapawn_batch.canonical_request), and the deadline in milliseconds, or
+        None if the body has none.
+
+    Raises:
+        ValueError: The body is not a valid request.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("the body must be a JSON object")
+    try:
+        cur_board = payload["board"]
+        board_size = payload["board_size"]
+        pawn_color = payload["color"]
+        number_moves_ahead = payload["depth"]
+    except KeyError as missing:
+        raise ValueError("missing field %s" % missing)
+    deadline_ms = payload.get("deadline_ms")
+
+    if isinstance(board_size, list):
+        board_size = tuple(board_size)
+    if not (is_integer(board_size) or (isinstance(board_size, tuple) and len(board_size) == 2 and
+                                       all(is_integer(size) for size in board_size))):
+        raise ValueError("board_size must be a number or a [rows, columns] pair")
+    rows, cols = hexapawn_bitboard.board_dimensions(board_size)
+    if not isinstance(cur_board, list) or len(cur_board) != rows or \
+            any(not isinstance(row_string, str) or len(row_string) != cols or set(row_string) - set("wb-")
+                for row_string in cur_board):
+        raise ValueError("board must be %d strings of %d characters among w, b and -" % (rows, cols))
+    hexapawn_bitboard.get_geometry(board_size)  # raises ValueError for boards too small to play on
+    if pawn_color not in ("w", "b"):
+        raise ValueError('color must be "w" or "b"')
+    if not is_integer(number_moves_ahead) or number_moves_ahead < 0:
+        raise ValueError("depth must be a number of moves, 0 or more")
+    if number_moves_ahead > max_depth:
+        raise ValueError("depth must be at most %d" % max_depth)
+    if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or
+                                    not math.isfinite(deadline_ms) or deadline_ms <= 0):
+        raise ValueError("deadline_ms must be a positive number")
+    key, transform = hexapawn_batch.canonical_request((cur_board, board_size, pawn_color, number_moves_ahead))
+    return key, transform, deadline_ms
+
+
+def search_position(key, time_budget_ms):
+    """This function searches one request inside a worker process.
+
+    Args:
+        key: A request key returned by hexapawn_batch.canonical_request.
+        time_budget_ms: The time left before the latest deadline of the requests waiting on the search, in
+            milliseconds. The clocks of the processes may differ, so the remaining time is sent rather than the
+            deadline itself.
+
+    Returns:
+        Every answer of the canonical position as good as the best one, see hexapawn_batch.search_request.
+
+    Raises:
+        hexapawn_bitboard.SearchTimeout: The time budget ran out.
+    """
+    return hexapawn_batch.search_request(key, hexapawn_parallel.get_worker_table(key[1]),
+                                         time.perf_counter() + time_budget_ms / 1000.0)
+
+
+class HexapawnServer:
+    """The state of a running server.
+
+    Attributes:
+        workers: The number of worker processes.
+        max_queue: The number of searches that may wait for a worker.
+        default_deadline_ms: The deadline of the requests that do not give one.
+        max_depth: The deepest search a request may ask for.
+        queue: The searches waiting for a worker, as (key, future) pairs.
+        in_flight: The future of every search queued or running, by request key, for the duplicates and symmetric
+            images to wait on.
+        latest_deadlines: The latest deadline of the requests waiting on each search in flight, in event loop time.
+    """
+
+    def __init__(self, workers=None, max_queue=DEFAULT_MAX_QUEUE, default_deadline_ms=DEFAULT_DEADLINE_MS,
+                 max_depth=DEFAULT_MAX_DEPTH):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.default_deadline_ms = default_deadline_ms
+        self.max_depth = max_depth
+        self.queue = None
+        self.in_flight = {}
+        self.latest_deadlines = {}
+        self._dispatchers = []
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """This function starts the process pool, the dispatchers and the listening socket.
+
+        Args:
+            host: The address to listen on.
+            port: The port to listen on, 0 picks a free one.
+
+        Returns:
+            The asyncio.Server.
+        """
+        if self.workers is None:
+            self.workers = os.cpu_count() or 1
+        pool = hexapawn_parallel.get_process_pool(self.workers)
+        # start the worker processes before listening: forked later, they would inherit the sockets of the open
+        # connections and keep them open after the server closes them
+        await asyncio.get_running_loop().run_in_executor(pool, os.getpid)
+        self.queue = asyncio.Queue(self.max_queue)
+        # one dispatcher per worker, so a queued search starts as soon as a worker is free and no earlier
+        self._dispatchers = [asyncio.ensure_future(self.dispatch(pool)) for worker in range(self.workers)]
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def stop(self):
+        """This function stops the dispatchers. The process pool is left to hexapawn_parallel."""
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+
+    async def dispatch(self, pool):
+        """This function runs the queued searches on the process pool, one at a time, forever.
+
+        A search whose requests have all passed their deadline while it was queued is dropped, and a running search
+        gives up at the latest deadline known when it starts. Requests for the same search that arrive later with a
+        later deadline get a 504 too if it gives up.
+
+        Args:
+            pool: The concurrent.futures.ProcessPoolExecutor.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            key, future = await self.queue.get()
+            try:
+                time_left = self.latest_deadlines[key] - loop.time()
+                if time_left <= 0:
+                    future.cancel()
+                    continue
+                try:
+                    result = await loop.run_in_executor(pool, search_position, key, time_left * 1000.0)
+                except hexapawn_bitboard.SearchTimeout:  # the requests still waiting get a 504, see find_move
+                    future.cancel()
+                except Exception as error:
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                del self.in_flight[key]
+                del self.latest_deadlines[key]
+                self.queue.task_done()
+
+    async def find_move(self, key, transform, deadline_ms):
+        """This function gets the best move of a request, sharing the search with identical or symmetric
+        requests in flight.
+
+        Args:
+            key: A request key returned by hexapawn_batch.canonical_request.
+            transform: The transform from the request to the key, returned with it.
+            deadline_ms: The time the request may wait, in milliseconds.
+
+        Returns:
+            The HTTP status and the JSON response.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + deadline_ms / 1000.0
+        future = self.in_flight.get(key)
+        if future is None:
+            future = loop.create_future()
+            try:
+                self.queue.put_nowait((key, future))
+            except asyncio.QueueFull:
+                return 503, {"error": "the server is busy, %d searches are queued" % self.max_queue}
+            self.in_flight[key] = future
+            self.latest_deadlines[key] = deadline
+        else:
+            self.latest_deadlines[key] = max(self.latest_deadlines[key], deadline)
+
+        try:
+            # shielded, so one request timing out does not cancel the search the others wait for
+            result = await asyncio.wait_for(asyncio.shield(future), deadline - loop.time())
+        except asyncio.TimeoutError:
+            return 504, {"error": "no move within %g ms" % deadline_ms}
+        except asyncio.CancelledError:
+            if future.cancelled():  # dropped, or given up by the worker, after the latest deadline passed
+                return 504, {"error": "no move within %g ms" % deadline_ms}
+            raise
+        except Exception as error:  # the search failed in the worker process
+            return 500, {"error": "%s: %s" % (type(error).__name__, error)}
+        return 200, {"move": hexapawn_batch.resolve_request(key, transform, result)}
+
+    async def handle_request(self, method, path, body):
+        """This function answers one HTTP request.
+
+        Args:
+            method: The HTTP method.
+            path: The request path.
+            body: The request body, bytes.
+
+        Returns:
+            The HTTP status and the JSON response.
+        """
+        if path == "/health":
+            return 200, {"status": "ok", "queued": self.queue.qsize(), "in_flight": len(self.in_flight),
+                         "workers": self.workers}
+        if path != "/move":
+            return 404, {"error": "unknown path %s" % path}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            key, transform, deadline_ms = parse_move_request(json.loads(body), self.max_depth)
+        except ValueError as error:  # json.JSONDecodeError included
+            return 400, {"error": str(error)}
+        return await self.find_move(key, transform, deadline_ms or self.default_deadline_ms)
+
+    async def handle_connection(self, reader, writer):
+        """This function serves the HTTP/1.1 requests of one connection, keeping it open between requests.
+
+        Args:
+            reader: The asyncio.StreamReader of the connection.
+            writer: The asyncio.StreamWriter of the connection.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.write_response(writer, 400, {"error": "malformed request line"}, False)
+                    break
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header_line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    content_length = int(headers.get("content-length", "0") or 0)
+                except ValueError:
+                    content_length = -1
+                if content_length < 0:
+                    await self.write_response(writer, 400, {"error": "malformed Content-Length"}, False)
+                    break
+                if content_length > MAX_BODY_BYTES:
+                    await self.write_response(writer, 413, {"error": "the body is too large"}, False)
+                    break
+                body = await reader.readexactly(content_length)
+                status, response = await self.handle_request(method, path.split("?")[0], body)
+                await self.write_response(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, status, response, keep_alive):
+        """This function sends a JSON response.
+
+        Args:
+            writer: The asyncio.StreamWriter of the connection.
+            status: The HTTP status.
+            response: The object to send as JSON.
+            keep_alive: Whether the connection stays open for another request.
+        """
+        body = json.dumps(response).encode("utf-8")
+        headers = ["HTTP/1.1 %d %s" % (status, _REASONS[status]), "Content-Type: application/json",
+                   "Content-Length: %d" % len(body), "Connection: %s" % ("keep-alive" if keep_alive else "close")]
+        if status == 503:
+            headers.append("Retry-After: 1")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, max_queue=DEFAULT_MAX_QUEUE,
+                default_deadline_ms=DEFAULT_DEADLINE_MS, max_depth=DEFAULT_MAX_DEPTH):
+    """This function runs a server until it is cancelled.
+
+    Args:
+        host: The address to listen on.
+        port: The port to listen on.
+        workers: The number of worker processes, by default the number of CPUs.
+        max_queue: The number of searches that may wait for a worker.
+        default_deadline_ms: The deadline of the requests that do not give one.
+        max_depth: The deepest search a request may ask for.
+    """
+    server = HexapawnServer(workers, max_queue, default_deadline_ms, max_depth)
+    listening_server = await server.start(host, port)
+    try:
+        async with listening_server:
+            await listening_server.serve_forever()
+    finally:
+        await server.stop()
+        hexapawn_parallel.shutdown_process_pool()
+
+
+def main(argv=None):
+    """This function is the command line tool that runs the server."""
+    parser = argparse.ArgumentParser(description="Serve hexapawn moves over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="the address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="the port to listen on")
+    parser.add_argument("--workers", type=int, help="the number of worker processes, by default the number of CPUs")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="the searches that may wait for a worker before requests are turned away")
+    parser.add_argument("--deadline-ms", type=float, default=DEFAULT_DEADLINE_MS,
+                        help="the deadline of the requests that do not give one")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH,
+                        help="the deepest search a request may ask for, deeper ones get a 400")
+    arguments = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, arguments.workers, arguments.max_queue,
+                          arguments.deadline_ms, arguments.max_depth))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
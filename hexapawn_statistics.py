@@ -0,0 +1,142 @@
+# hexapawn_statistics.py
+# Search instrumentation: counters filled in by the bitboard, minimax and alpha-beta searches, and a
+# cProfile/tracemalloc wrapper.
+#
+# A search only touches the counters when it is given a SearchStatistics, so leaving statistics off costs one
+# "is not None" test per node.
+
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+
+PROFILE_REPORT_LINES = 30  # functions and allocation sites listed in a profile report
+
+
+class SearchStatistics:
+    """The counters of one or more searches.
+
+    Attributes:
+        nodes_per_ply: The number of nodes visited at each distance from the root.
+        leaf_evaluations: The number of nodes scored by the static board evaluation without being expanded.
+        move_generator_calls: The number of times the moves of a node were generated.
+        cache_hits: The number of transposition table probes that found the position.
+        cache_misses: The number of transposition table probes that did not.
+        table_cutoffs: The number of nodes answered by the transposition table without a search.
+        cutoffs: The number of alpha-beta cutoffs.
+        mirror_duplicates: The number of moves not searched because they mirror a sibling.
+        iterations: One dictionary per root search (per depth of an iterative deepening search) with its depth,
+            elapsed seconds, nodes and whether it completed.
+    """
+
+    def __init__(self):
+        self.nodes_per_ply = defaultdict(int)
+        self.leaf_evaluations = 0
+        self.move_generator_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.table_cutoffs = 0
+        self.cutoffs = 0
+        self.mirror_duplicates = 0
+        self.iterations = []
+
+    @property
+    def nodes(self):
+        """The total number of nodes visited."""
+        return sum(self.nodes_per_ply.values())
+
+    def branching_factor(self):
+        """This function computes the effective branching factor, the average number of children searched per
+        expanded node.
+
+        Returns:
+            The branching factor, or 0.0 if no node was expanded.
+        """
+        expanded_nodes = self.nodes - self.leaf_evaluations - self.table_cutoffs
+        if expanded_nodes <= 0:
+            return 0.0
+        return (self.nodes - self.nodes_per_ply.get(0, 0)) / expanded_nodes
+
+    def record_iteration(self, depth, elapsed_seconds, nodes, completed=True):
+        """This function records the time spent by one root search.
+
+        Args:
+            depth: The number of moves looked ahead.
+            elapsed_seconds: The wall-clock time of the search.
+            nodes: The number of nodes it visited.
+            completed: False if the search was stopped by its deadline.
+        """
+        self.iterations.append({"depth": depth, "seconds": elapsed_seconds, "nodes": nodes, "completed": completed})
+
+    def as_dict(self):
+        """This function exports the counters, for logging or dashboards.
+
+        Returns:
+            A dictionary of plain numbers and lists that json.dumps accepts.
+        """
+        elapsed_seconds = sum(iteration["seconds"] for iteration in self.iterations)
+        return {
+            "nodes": self.nodes,
+            "nodes_per_ply": [self.nodes_per_ply[ply] for ply in range(max(self.nodes_per_ply, default=-1) + 1)],
+            "leaf_evaluations": self.leaf_evaluations,
+            "move_generator_calls": self.move_generator_calls,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "table_cutoffs": self.table_cutoffs,
+            "cutoffs": self.cutoffs,
+            "mirror_duplicates": self.mirror_duplicates,
+            "branching_factor": self.branching_factor(),
+            "elapsed_seconds": elapsed_seconds,
+            "nodes_per_second": self.nodes / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+            "iterations": list(self.iterations),
+        }
+
+    def __repr__(self):
+        return "SearchStatistics(%s)" % json.dumps(self.as_dict())
+
+
+def profile_search(report_path, function, *args, **kwargs):
+    """This function runs a search under cProfile and tracemalloc and writes what they measured.
+
+    Two files are written: report_path, a text report with the functions taking the most time, the peak traced
+    memory and the lines allocating the most memory, and report_path + ".prof", the raw cProfile data for pstats or
+    a profile viewer.
+
+    Args:
+        report_path: The path of the text report.
+        function: The search to run, for example hexapawn.hexapawn.
+        *args: The positional arguments of the search.
+        **kwargs: The keyword arguments of the search.
+
+    Returns:
+        What the search returns.
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    started_at = time.perf_counter()
+    try:
+        result = profiler.runcall(function, *args, **kwargs)
+        elapsed_seconds = time.perf_counter() - started_at
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+
+    profiler.dump_stats(report_path + ".prof")
+    profile_text = io.StringIO()
+    pstats.Stats(profiler, stream=profile_text).sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+    with open(report_path, "w") as report_file:
+        report_file.write("elapsed seconds: %.6f\n" % elapsed_seconds)
+        report_file.write("peak traced memory: %d bytes\n\n" % peak_memory)
+        report_file.write("top allocation sites:\n")
+        for allocation in snapshot.statistics("lineno")[:PROFILE_REPORT_LINES]:
+            report_file.write("    %s\n" % allocation)
+        report_file.write("\n")
+        report_file.write(profile_text.getvalue())
+    return result
@@ -0,0 +1,150 @@
+# hexapawn_symmetry.py
+# Board symmetries: mirrored siblings are searched once, and result caches are keyed by a canonical position.
+#
+# Two transforms map a position to one with the same value for the side to move: the left-right mirror, and the
+# color flip, which swaps the colors, turns the board upside down and hands the move to the other side. Each is its
+# own inverse and they commute, so the four combinations (a bit mask of MIRROR and COLOR_FLIP) form a group and the
+# transform that maps a position to its canonical form also maps the canonical answer back.
+#
+# Values are symmetric but the tie-break of hexapawn() (the earliest move in move_generator order) is not, so a
+# cache keyed by the canonical position stores every tied best move and resolve_move picks the one the caller's
+# orientation would have picked.
+
+import hexapawn_bitboard
+
+IDENTITY = 0
+MIRROR = 1  # left-right mirror
+COLOR_FLIP = 2  # swap the colors and the side to move, and flip the board upside down
+
+_SWAP_COLORS = str.maketrans("wb", "bw")
+
+
+def mirror_board(cur_board):
+    """This function mirrors a board left to right.
+
+    Args:
+        cur_board: The n-element list.
+
+    Returns:
+        A new list of strings.
+    """
+    return [row_string[::-1] for row_string in cur_board]
+
+
+def is_mirror_symmetric(cur_board):
+    """This function checks if a board is its own mirror image.
+
+    Args:
+        cur_board: The n-element list.
+
+    Returns:
+        A boolean value.
+    """
+    for row_string in cur_board:
+        if row_string != row_string[::-1]:
+            return False
+    return True
+
+
+def transform_board(cur_board, transform):
+    """This function applies a symmetry to a board.
+
+    Args:
+        cur_board: The n-element list, or an empty list (the answer of a search 0 moves ahead), which stays empty.
+        transform: A combination of MIRROR and COLOR_FLIP.
+
+    Returns:
+        A new list of strings.
+    """
+    if transform & COLOR_FLIP:
+        cur_board = [row_string.translate(_SWAP_COLORS) for row_string in reversed(cur_board)]
+    if transform & MIRROR:
+        cur_board = mirror_board(cur_board)
+    return list(cur_board)
+
+
+def transform_color(pawn_color, transform):
+    """This function gives the side to move after a symmetry.
+
+    Args:
+        pawn_color: The color indicates whose turn to move the pawn.
+        transform: A combination of MIRROR and COLOR_FLIP.
+
+    Returns:
+        "w" or "b".
+    """
+    if transform & COLOR_FLIP:
+        return "b" if pawn_color == "w" else "w"
+    return pawn_color
+
+
+def canonical_position(cur_board, pawn_color):
+    """This function picks one representative among a position and its symmetric images.
+
+    The canonical form is the smallest (board, side to move) of the four images, so all of them share it.
+
+    Args:
+        cur_board: The n-element list.
+        pawn_color: The color indicates whose turn to move the pawn.
+
+    Returns:
+        The canonical board as a tuple of strings, the side to move in it, and the transform that maps cur_board to
+        it (and back).
+    """
+    canonical = None
+    for transform in (IDENTITY, MIRROR, COLOR_FLIP, MIRROR | COLOR_FLIP):
+        image = (tuple(transform_board(cur_board, transform)), transform_color(pawn_color, transform))
+        if canonical is None or image < canonical[0]:
+            canonical = image, transform
+    (canonical_board, canonical_color), transform = canonical
+    return canonical_board, canonical_color, transform
+
+
+def unique_moves(moves, board_size):
+    """This function drops the moves of a mirror-symmetric board that mirror an earlier move.
+
+    The moves of a mirror-symmetric board come in mirrored pairs with the same value. Keeping the first of each pair
+    in generator order leaves the best value and the move picked by the searches unchanged, since a later move never
+    replaces an earlier one of the same value. For the (from row, from column, to row, to column) moves of
+    hexapawn.generate_moves, a pawn left of the middle column moves before its mirror image, and the middle pawn
+    captures towards column - 1 before column + 1, so comparing the columns with their mirror images keeps the first
+    of each pair.
+
+    Args:
+        moves: The moves of a mirror-symmetric board, in generator order.
+        board_size: The size of a square board, or a (rows, columns) pair.
+
+    Returns:
+        A new list with the kept moves, in the same order.
+    """
+    last_col_idx = hexapawn_bitboard.board_dimensions(board_size)[1] - 1
+    return [move for move in moves if (move[1], move[3]) <= (last_col_idx - move[1], last_col_idx - move[3])]
+
+
+def resolve_move(cur_board, board_size, pawn_color, transform, candidates):
+    """This function maps the answer of a canonical position back to the caller's board.
+
+    Args:
+        cur_board: The board of the caller.
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn on cur_board.
+        transform: The transform from cur_board to the canonical position.
+        candidates: Every answer of the canonical position as good as the best one, as returned by
+            hexapawn_bitboard.tied_moves_algorithm.
+
+    Returns:
+        The move hexapawn.hexapawn returns for cur_board: the candidate that comes first in its move generator
+        order.
+    """
+    candidates = [transform_board(candidate, transform) for candidate in candidates]
+    if len(candidates) == 1:
+        return candidates[0]
+    candidate_boards = {tuple(candidate) for candidate in candidates}
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    white, black = hexapawn_bitboard.board_to_bitboards(cur_board)
+    for move in hexapawn_bitboard.generate_moves(white, black, pawn_color, geometry):
+        new_board = hexapawn_bitboard.bitboards_to_board(*hexapawn_bitboard.make_move(white, black, move, pawn_color),
+                                                         geometry)
+        if tuple(new_board) in candidate_boards:
+            return new_board
+    raise ValueError("none of the candidates is a move of the board")
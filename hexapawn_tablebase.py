@@ -0,0 +1,407 @@
+# hexapawn_tablebase.py
+# Retrograde-analysis tablebase: every position reachable from the start of a small board, solved for perfect play.
+#
+# The solver enumerates every position reachable from the starting board (either side moving first) with the
+# bitboard move generator, then solves them backwards: pawns only move forward, so a position can be solved as soon
+# as all positions further into the game are. Each position gets a result (win, loss or draw for the side to move)
+# and the number of moves to the end of the game under perfect play.
+#
+# File layout, native byte order:
+#     header (32 bytes): magic, version, rows, cols, byte order check, padding, slot count, entry count
+#     keys (8 bytes per slot): position keys of an open-addressing hash table, 0 marks an empty slot
+#     values (2 bytes per slot): result << 14 | distance to the end of the game
+# The file is loaded with mmap and read through memoryview casts, so lookups copy nothing and every process that
+# opens the same file shares one copy in the page cache.
+
+import argparse
+import mmap
+import struct
+import sys
+from array import array
+
+import hexapawn_bitboard
+
+WIN = 0
+LOSS = 1
+DRAW = 2  # never produced: hexapawn always ends, and a side that cannot move loses
+
+_MAGIC = b"HXTB"
+_VERSION = 1
+_BYTE_ORDER_CHECK = 0x01020304
+_HEADER = struct.Struct("=4sHBBIIQQ")
+_DISTANCE_MASK = (1 << 14) - 1
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MAX_LOAD = 0.5  # the hash table is kept at most half full so probe sequences stay short
+
+
+def position_key(white, black, whose_turn, geometry):
+    """This function packs a position into one integer.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+
+    Returns:
+        white | black << squares | side bit << 2 * squares, which fits in 64 bits for boards of up to 31 squares.
+    """
+    squares = geometry.rows * geometry.cols
+    key = white | (black << squares)
+    if whose_turn == "b":
+        key |= 1 << (2 * squares)
+    return key
+
+
+def slot_index(key, slot_bits):
+    """This function computes the first slot probed for a key.
+
+    Args:
+        key: A position key.
+        slot_bits: The log2 of the number of slots.
+
+    Returns:
+        The slot index.
+    """
+    return ((key * _HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - slot_bits)
+
+
+class TablebaseBuilder:
+    """The in-memory open-addressing table used while enumerating and solving, in the same layout as the file.
+
+    Attributes:
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+        slot_bits: The log2 of the number of slots.
+        entry_count: The number of stored positions.
+    """
+
+    def __init__(self, geometry, slot_bits=10):
+        self.geometry = geometry
+        self.slot_bits = slot_bits
+        self.entry_count = 0
+        self._keys = array("Q", [0]) * (1 << slot_bits)
+        self._values = array("H", [0]) * (1 << slot_bits)
+
+    def find_slot(self, key):
+        """This function finds the slot of a key, or the empty slot where it would go.
+
+        Args:
+            key: A position key.
+
+        Returns:
+            The slot index.
+        """
+        keys = self._keys
+        slot_mask = (1 << self.slot_bits) - 1
+        index = slot_index(key, self.slot_bits)
+        while keys[index] != key and keys[index] != 0:
+            index = (index + 1) & slot_mask
+        return index
+
+    def add(self, key):
+        """This function adds a position key if it is not stored yet.
+
+        Args:
+            key: A position key.
+
+        Returns:
+            True if the key is new.
+        """
+        index = self.find_slot(key)
+        if self._keys[index] == key:
+            return False
+        self._keys[index] = key
+        self.entry_count += 1
+        if self.entry_count > _MAX_LOAD * len(self._keys):
+            self._grow()
+        return True
+
+    def get(self, key):
+        """This function returns the packed value of a stored key."""
+        return self._values[self.find_slot(key)]
+
+    def set(self, key, value):
+        """This function sets the packed value of a stored key."""
+        self._values[self.find_slot(key)] = value
+
+    def _grow(self):
+        old_keys, old_values = self._keys, self._values
+        self.slot_bits += 1
+        self._keys = array("Q", [0]) * (1 << self.slot_bits)
+        self._values = array("H", [0]) * (1 << self.slot_bits)
+        for key, value in zip(old_keys, old_values):
+            if key:
+                index = self.find_slot(key)
+                self._keys[index] = key
+                self._values[index] = value
+
+    def write(self, path):
+        """This function writes the table to a tablebase file.
+
+        Args:
+            path: The path of the file.
+        """
+        with open(path, "wb") as tablebase_file:
+            tablebase_file.write(_HEADER.pack(_MAGIC, _VERSION, self.geometry.rows, self.geometry.cols,
+                                              _BYTE_ORDER_CHECK, 0, len(self._keys), self.entry_count))
+            tablebase_file.write(self._keys.tobytes())
+            tablebase_file.write(self._values.tobytes())
+
+
+def game_progress(white, black, geometry):
+    """This function measures how far a game has gone, a number that grows with every move.
+
+    A capture removes a pawn, which outweighs any change of advancement, and any other move advances a pawn by one
+    row. Solving positions from the highest progress down therefore solves every child before its parents.
+
+    Args:
+        white: The white bitboard.
+        black: The black bitboard.
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+
+    Returns:
+        The progress of the position.
+    """
+    advancement = 0
+    row_mask = geometry.first_row_mask
+    for row_idx in range(geometry.rows):
+        advancement += (white & row_mask).bit_count() * row_idx
+        advancement += (black & row_mask).bit_count() * (geometry.rows - 1 - row_idx)
+        row_mask <<= geometry.cols
+    captured = 2 * geometry.cols - (white | black).bit_count()
+    return captured * 2 * geometry.cols * geometry.rows + advancement
+
+
+def build_tablebase(board_size, path):
+    """This function solves every position reachable from the start of a board and writes the tablebase file.
+
+    Args:
+        board_size: The size of a square board, or a (rows, columns) pair, of at most 31 squares so positions fit
+            the 64-bit keys.
+        path: The path of the file to write.
+
+    Returns:
+        The number of positions solved.
+    """
+    geometry = hexapawn_bitboard.get_geometry(board_size)
+    squares = geometry.rows * geometry.cols
+    if 2 * squares + 1 > 64:
+        raise ValueError("tablebases support boards of up to 31 squares, got %d" % squares)
+    builder = TablebaseBuilder(geometry)
+
+    # enumerate the reachable positions, grouped by game progress
+    positions_by_progress = {}
+    start_white, start_black = geometry.first_row_mask, geometry.last_row_mask
+    stack = []
+    for whose_turn in ("w", "b"):
+        builder.add(position_key(start_white, start_black, whose_turn, geometry))
+        stack.append((start_white, start_black, whose_turn))
+    while stack:
+        white, black, whose_turn = stack.pop()
+        progress = game_progress(white, black, geometry)
+        if progress not in positions_by_progress:
+            positions_by_progress[progress] = array("Q")
+        positions_by_progress[progress].append(position_key(white, black, whose_turn, geometry))
+
+        board_value, game_over = hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, geometry)
+        if game_over:
+            continue
+        next_turn = "b" if whose_turn == "w" else "w"
+        for move in hexapawn_bitboard.generate_moves(white, black, whose_turn, geometry):
+            new_white, new_black = hexapawn_bitboard.make_move(white, black, move, whose_turn)
+            if builder.add(position_key(new_white, new_black, next_turn, geometry)):
+                stack.append((new_white, new_black, next_turn))
+
+    # solve them backwards, from the end of the game to the start
+    square_mask = (1 << squares) - 1
+    for progress in sorted(positions_by_progress, reverse=True):
+        for key in positions_by_progress[progress]:
+            white = key & square_mask
+            black = (key >> squares) & square_mask
+            whose_turn = "b" if key >> (2 * squares) else "w"
+            builder.set(key, solve_position(builder, white, black, whose_turn, geometry))
+        del positions_by_progress[progress]
+
+    builder.write(path)
+    return builder.entry_count
+
+
+def solve_position(builder, white, black, whose_turn, geometry):
+    """This function computes the packed value of a position whose children are all solved.
+
+    Args:
+        builder: The TablebaseBuilder holding the solved children.
+        white: The white bitboard.
+        black: The black bitboard.
+        whose_turn: A character indicates which side to move this turn.
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+
+    Returns:
+        result << 14 | distance, for the side to move.
+    """
+    board_value, game_over = hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, geometry)
+    if game_over:
+        return (WIN if board_value > 0 else LOSS) << 14
+
+    next_turn = "b" if whose_turn == "w" else "w"
+    fastest_win = None
+    slowest_loss = 0
+    has_draw = False
+    for move in hexapawn_bitboard.generate_moves(white, black, whose_turn, geometry):
+        new_white, new_black = hexapawn_bitboard.make_move(white, black, move, whose_turn)
+        child_value = builder.get(position_key(new_white, new_black, next_turn, geometry))
+        child_result, child_distance = child_value >> 14, child_value & _DISTANCE_MASK
+        if child_result == LOSS:  # the opponent loses after this move
+            if fastest_win is None or child_distance < fastest_win:
+                fastest_win = child_distance
+        elif child_result == DRAW:
+            has_draw = True
+        elif child_distance > slowest_loss:
+            slowest_loss = child_distance
+    if fastest_win is not None:
+        return (WIN << 14) | (fastest_win + 1)
+    if has_draw:
+        return DRAW << 14
+    return (LOSS << 14) | (slowest_loss + 1)
+
+
+class Tablebase:
+    """A tablebase file mapped into memory.
+
+    Attributes:
+        geometry: The hexapawn_bitboard.BoardGeometry of the board.
+        entry_count: The number of solved positions.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as tablebase_file:
+            self._mapped_file = mmap.mmap(tablebase_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, cols, byte_order_check, padding, slot_count, entry_count = \
+            _HEADER.unpack_from(self._mapped_file)
+        if magic != _MAGIC or version != _VERSION:
+            self._mapped_file.close()
+            raise ValueError("not a hexapawn tablebase file: " + str(path))
+        if byte_order_check != _BYTE_ORDER_CHECK:
+            self._mapped_file.close()
+            raise ValueError("tablebase file was written with another byte order: " + str(path))
+
+        self.geometry = hexapawn_bitboard.get_geometry((rows, cols))
+        self.entry_count = entry_count
+        self._slot_bits = slot_count.bit_length() - 1
+        mapped_view = memoryview(self._mapped_file)
+        keys_end = _HEADER.size + 8 * slot_count
+        self._keys = mapped_view[_HEADER.size:keys_end].cast("Q")
+        self._values = mapped_view[keys_end:keys_end + 2 * slot_count].cast("H")
+        mapped_view.release()
+
+    def close(self):
+        """This function unmaps the file."""
+        self._keys.release()
+        self._values.release()
+        self._mapped_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def probe(self, white, black, whose_turn):
+        """This function looks up a position.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+
+        Returns:
+            The result (WIN, LOSS or DRAW) for the side to move and the number of moves to the end of the game, or
+            None if the position is not in the tablebase.
+        """
+        key = position_key(white, black, whose_turn, self.geometry)
+        keys = self._keys
+        slot_mask = len(keys) - 1
+        index = slot_index(key, self._slot_bits)
+        while True:
+            stored_key = keys[index]
+            if stored_key == key:
+                value = self._values[index]
+                return value >> 14, value & _DISTANCE_MASK
+            if stored_key == 0:
+                return None
+            index = (index + 1) & slot_mask
+
+    def best_move(self, white, black, whose_turn):
+        """This function picks a perfect move: the fastest win, or else the slowest loss.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+
+        Returns:
+            The move, or None if the game is over or the position is not in the tablebase.
+        """
+        if self.probe(white, black, whose_turn) is None:
+            return None
+        board_value, game_over = hexapawn_bitboard.static_board_evaluation(white, black, whose_turn, self.geometry)
+        if game_over:
+            return None
+
+        next_turn = "b" if whose_turn == "w" else "w"
+        best_move = None
+        best_rank = None
+        for move in hexapawn_bitboard.generate_moves(white, black, whose_turn, self.geometry):
+            new_white, new_black = hexapawn_bitboard.make_move(white, black, move, whose_turn)
+            child_result, child_distance = self.probe(new_white, new_black, next_turn)
+            # rank the moves: opponent loses (fastest first), then draw, then opponent wins (slowest first)
+            if child_result == LOSS:
+                rank = (2, -child_distance)
+            elif child_result == DRAW:
+                rank = (1, 0)
+            else:
+                rank = (0, child_distance)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+
+def tablebase_algorithm(cur_board, board_size, pawn_color, tablebase):
+    """This function answers from a tablebase with perfect play.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        tablebase: A Tablebase.
+
+    Returns: A list of string representing the perfect move, cur_board if the game is over, or None if the
+        tablebase does not cover the position.
+
+    """
+    geometry = tablebase.geometry
+    if (geometry.rows, geometry.cols) != hexapawn_bitboard.board_dimensions(board_size):
+        return None
+    white, black = hexapawn_bitboard.board_to_bitboards(cur_board)
+    if tablebase.probe(white, black, pawn_color) is None:
+        return None
+    best_move = tablebase.best_move(white, black, pawn_color)
+    if best_move is None:  # one side has already won
+        return cur_board
+    return hexapawn_bitboard.bitboards_to_board(*hexapawn_bitboard.make_move(white, black, best_move, pawn_color),
+                                                geometry)
+
+
+def main(argv=None):
+    """This function is the command line tool that builds a tablebase file."""
+    parser = argparse.ArgumentParser(description="Solve every reachable position of a hexapawn board.")
+    parser.add_argument("rows", type=int, help="the number of rows")
+    parser.add_argument("cols", type=int, help="the number of columns, rows * cols must be at most 31")
+    parser.add_argument("path", help="the tablebase file to write")
+    arguments = parser.parse_args(argv)
+    entry_count = build_tablebase((arguments.rows, arguments.cols), arguments.path)
+    print("solved %d positions into %s" % (entry_count, arguments.path))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
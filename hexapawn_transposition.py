@@ -0,0 +1,185 @@
+# hexapawn_transposition.py
+# Zobrist hashing and a bounded-memory transposition table for the bitboard search.
+#
+# Every entry is two 64-bit words in array storage, so the memory cap is exact: the full Zobrist key, and a packed
+# word holding the value, depth, bound type, best move and the search generation that wrote it.
+
+import random
+from array import array
+
+EXACT = 0  # the stored value is the value of the position
+LOWER_BOUND = 1  # the search failed high, the value is at least the stored value
+UPPER_BOUND = 2  # the search failed low, the value is at most the stored value
+
+ENTRY_SIZE = 16  # bytes: one key word and one data word
+
+_VALUE_OFFSET = 1 << 23  # values are stored in 24 bits with an offset
+_NO_MOVE = (1 << 21) - 1
+
+_zobrist_keys = {}
+
+
+class ZobristKeys:
+    """The random keys of one board size.
+
+    The hash of a position is the xor of the key of every (color, square) holding a pawn, plus the side key when
+    black is to move. A move changes it by xoring the keys of the squares it touches, so children are hashed in O(1).
+
+    Attributes:
+        white_keys: The key of a white pawn on each square.
+        black_keys: The key of a black pawn on each square.
+        side_key: The key xored in when black is to move.
+    """
+
+    def __init__(self, rows, cols):
+        # a fixed seed per board size keeps hashes stable across processes and runs
+        generator = random.Random("hexapawn-zobrist-%d-%d" % (rows, cols))
+        self.white_keys = [generator.getrandbits(64) for _ in range(rows * cols)]
+        self.black_keys = [generator.getrandbits(64) for _ in range(rows * cols)]
+        self.side_key = generator.getrandbits(64)
+
+    def hash_position(self, white, black, whose_turn):
+        """This function hashes a position from scratch.
+
+        Args:
+            white: The white bitboard.
+            black: The black bitboard.
+            whose_turn: A character indicates which side to move this turn.
+
+        Returns:
+            The 64-bit Zobrist hash.
+        """
+        position_hash = self.side_key if whose_turn == "b" else 0
+        for pawns, keys in ((white, self.white_keys), (black, self.black_keys)):
+            while pawns:
+                low_bit = pawns & -pawns
+                pawns ^= low_bit
+                position_hash ^= keys[low_bit.bit_length() - 1]
+        return position_hash
+
+    def hash_after_move(self, position_hash, white, black, move, whose_turn):
+        """This function updates a hash for one move instead of rehashing the whole board.
+
+        Args:
+            position_hash: The hash before the move.
+            white: The white bitboard before the move.
+            black: The black bitboard before the move.
+            move: A (from square, to square) tuple.
+            whose_turn: A character indicates which side plays the move.
+
+        Returns:
+            The hash after the move.
+        """
+        from_square, to_square = move
+        if whose_turn == "w":
+            position_hash ^= self.white_keys[from_square] ^ self.white_keys[to_square] ^ self.side_key
+            if black >> to_square & 1:  # captured black pawn
+                position_hash ^= self.black_keys[to_square]
+        else:
+            position_hash ^= self.black_keys[from_square] ^ self.black_keys[to_square] ^ self.side_key
+            if white >> to_square & 1:  # captured white pawn
+                position_hash ^= self.white_keys[to_square]
+        return position_hash
+
+
+def get_zobrist_keys(rows, cols):
+    """This function returns the cached Zobrist keys of a board size.
+
+    Args:
+        rows: The number of rows.
+        cols: The number of columns.
+
+    Returns:
+        A ZobristKeys.
+    """
+    keys = _zobrist_keys.get((rows, cols))
+    if keys is None:
+        keys = _zobrist_keys[(rows, cols)] = ZobristKeys(rows, cols)
+    return keys
+
+
+class TranspositionTable:
+    """A fixed-size hash table of search results that can be kept across searches.
+
+    Each slot has two entries. The depth-preferred entry is only replaced by a search at least as deep, or by any
+    search once it was written by an older generation. The always-replace entry takes everything else, so recent
+    shallow results are kept without pushing out expensive deep ones.
+
+    Attributes:
+        max_bytes: The memory cap of the entries.
+        number_of_slots: The number of two-entry slots that fit in max_bytes.
+        generation: The counter of new_search calls, stored in entries to age them.
+    """
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        number_of_slots = 1
+        while number_of_slots * 4 * ENTRY_SIZE <= max_bytes:
+            number_of_slots *= 2
+        if number_of_slots * 2 * ENTRY_SIZE > max_bytes:
+            raise ValueError("max_bytes must fit at least one slot of %d bytes" % (2 * ENTRY_SIZE))
+        self.max_bytes = max_bytes
+        self.number_of_slots = number_of_slots
+        self.generation = 0
+        self._slot_mask = number_of_slots - 1
+        self._keys = array("Q", [0]) * (2 * number_of_slots)
+        self._data = array("Q", [0]) * (2 * number_of_slots)
+
+    def new_search(self):
+        """This function starts a new search so entries of earlier searches can be replaced first."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def clear(self):
+        """This function removes every entry."""
+        self._keys = array("Q", [0]) * len(self._keys)
+        self._data = array("Q", [0]) * len(self._data)
+
+    def probe(self, position_hash):
+        """This function looks up a position.
+
+        Args:
+            position_hash: The Zobrist hash of the position.
+
+        Returns:
+            A (depth, bound type, value, best move) tuple, or None if the position is not stored. The best move is
+            None if the entry has no move.
+        """
+        index = (position_hash & self._slot_mask) << 1
+        keys = self._keys
+        if keys[index] == position_hash:
+            data = self._data[index]
+        elif keys[index + 1] == position_hash:
+            data = self._data[index + 1]
+        else:
+            return None
+
+        move_bits = (data >> 34) & 0x1FFFFF
+        best_move = None if move_bits == _NO_MOVE else (move_bits >> 10, move_bits & 0x3FF)
+        return (data >> 24) & 0xFF, (data >> 32) & 0x3, (data & 0xFFFFFF) - _VALUE_OFFSET, best_move
+
+    def store(self, position_hash, depth, bound, value, best_move):
+        """This function stores the result of searching a position.
+
+        Args:
+            position_hash: The Zobrist hash of the position.
+            depth: The number of moves the position was searched ahead.
+            bound: EXACT, LOWER_BOUND or UPPER_BOUND.
+            value: The value for the side to move.
+            best_move: The best or cutoff move, or None.
+        """
+        if best_move is None:
+            move_bits = _NO_MOVE
+        else:
+            move_bits = (best_move[0] << 10) | best_move[1]
+        data = (value + _VALUE_OFFSET) | (min(depth, 0xFF) << 24) | (bound << 32) | (move_bits << 34) | \
+            (self.generation << 55)
+
+        index = (position_hash & self._slot_mask) << 1
+        keys = self._keys
+        stored_data = self._data[index]
+        if keys[index] == 0 or keys[index] == position_hash or depth >= (stored_data >> 24) & 0xFF or \
+                (stored_data >> 55) != self.generation:
+            keys[index] = position_hash
+            self._data[index] = data
+        else:
+            keys[index + 1] = position_hash
+            self._data[index + 1] = data
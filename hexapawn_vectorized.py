@@ -0,0 +1,350 @@
+# hexapawn_vectorized.py
+# NumPy backend: whole frontiers of positions searched breadth-first with array operations.
+#
+# A frontier is a uint8 tensor of shape (batch, rows, cols) holding EMPTY, WHITE or BLACK for every square. The move
+# masks, the end of game rules, the pawn counts and the mobility of every board of a frontier are computed at once,
+# then the frontier is expanded into the next one in bulk. The search is full-width, without alpha-beta pruning, so it
+# pays off on wide, shallow searches, where a Python search spends its time on the last plies anyway.
+#
+# NumPy is an optional dependency: the module imports without it, and its functions raise ImportError when called.
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import hexapawn_bitboard
+
+EMPTY = 0
+WHITE = 1
+BLACK = 2
+
+DEFAULT_MAX_FRONTIER = 20000  # boards expanded at a time, larger frontiers are searched in chunks
+
+_SQUARE_CODES = bytes.maketrans(b"-wb", bytes((EMPTY, WHITE, BLACK)))
+_SQUARE_CHARACTERS = b"-wb"
+_MAX_PACKED_COLS = 64  # wider rows do not fit a row bitmask, their boards are evaluated square by square
+
+
+def require_numpy():
+    """This function checks that the optional NumPy dependency is installed.
+
+    Raises:
+        ImportError: NumPy is not installed.
+    """
+    if numpy is None:
+        raise ImportError("the vectorized search needs NumPy, install it with: pip install numpy")
+
+
+def boards_to_tensor(boards, board_size):
+    """This function stacks boards into a frontier tensor.
+
+    Args:
+        boards: A list of boards, each a list of strings.
+        board_size: The size of a square board, or a (rows, columns) pair.
+
+    Returns:
+        A numpy uint8 array of shape (len(boards), rows, cols).
+    """
+    require_numpy()
+    rows, cols = hexapawn_bitboard.board_dimensions(board_size)
+    squares = "".join("".join(cur_board) for cur_board in boards).encode("ascii").translate(_SQUARE_CODES)
+    return numpy.frombuffer(squares, dtype=numpy.uint8).reshape(len(boards), rows, cols).copy()
+
+
+def tensor_to_boards(tensor):
+    """This function converts a frontier tensor back to boards.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+
+    Returns:
+        A list of boards, each a list of strings.
+    """
+    require_numpy()
+    batch, rows, cols = tensor.shape
+    characters = numpy.frombuffer(_SQUARE_CHARACTERS, dtype=numpy.uint8)[tensor].tobytes().decode("ascii")
+    board_length = rows * cols
+    return [[characters[start + row_idx * cols:start + (row_idx + 1) * cols] for row_idx in range(rows)]
+            for start in range(0, batch * board_length, board_length)]
+
+
+def move_kind_masks(tensor, whose_turn):
+    """This function finds the pawns that can move forward, capture towards column - 1 and capture towards column + 1.
+
+    The masks leave out the row the pawns of the side to move cannot move from, so each is one row shorter than the
+    board.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+
+    Returns:
+        Three numpy bool arrays of shape (batch, rows - 1, cols), for the forward moves, the captures towards
+        column - 1 and the captures towards column + 1.
+    """
+    if whose_turn == "w":
+        pawns = tensor[:, :-1, :] == WHITE
+        ahead = tensor[:, 1:, :]
+        opponent_code = BLACK
+    else:
+        pawns = tensor[:, 1:, :] == BLACK
+        ahead = tensor[:, :-1, :]
+        opponent_code = WHITE
+    forward_mask = pawns & (ahead == EMPTY)
+    left_capture_mask = numpy.zeros_like(pawns)
+    left_capture_mask[:, :, 1:] = pawns[:, :, 1:] & (ahead[:, :, :-1] == opponent_code)
+    right_capture_mask = numpy.zeros_like(pawns)
+    right_capture_mask[:, :, :-1] = pawns[:, :, :-1] & (ahead[:, :, 1:] == opponent_code)
+    return forward_mask, left_capture_mask, right_capture_mask
+
+
+def legal_move_masks(tensor, whose_turn):
+    """This function finds the valid moves of every board of a frontier.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+
+    Returns:
+        A numpy bool array of shape (batch, rows, cols, 3): [..., 0] marks the pawns that can move forward, [..., 1]
+        the ones that can capture towards column - 1 and [..., 2] the ones that can capture towards column + 1.
+    """
+    masks = numpy.zeros(tensor.shape + (3,), dtype=bool)
+    moving_rows = slice(None, -1) if whose_turn == "w" else slice(1, None)
+    masks[:, moving_rows] = numpy.stack(move_kind_masks(tensor, whose_turn), axis=-1)
+    return masks
+
+
+def mobility(tensor, whose_turn):
+    """This function counts the valid moves of every board of a frontier.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+
+    Returns:
+        A numpy int array of shape (batch,).
+    """
+    return sum(mask.sum(axis=(1, 2)) for mask in move_kind_masks(tensor, whose_turn))
+
+
+def row_bitmasks(tensor, code):
+    """This function packs the squares holding a code into one bitmask per row, bit c standing for column c.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols), with at most 64 columns.
+        code: EMPTY, WHITE or BLACK.
+
+    Returns:
+        A numpy unsigned int array of shape (batch, rows) with the bitmasks, and a numpy int32 array of shape (batch,)
+        with the number of squares holding the code on every board.
+    """
+    batch, rows, cols = tensor.shape
+    word_bytes = 1
+    while word_bytes * 8 < cols:
+        word_bytes *= 2
+    squares = tensor == code
+    if cols != word_bytes * 8:  # pad the rows to whole words, packing one flat array is much faster than per row
+        padded = numpy.zeros((batch, rows, word_bytes * 8), dtype=bool)
+        padded[:, :, :cols] = squares
+        squares = padded
+    # the squares are bytes of 0 or 1: adding them 8 at a time as 64-bit words sums 8 byte lanes side by side (a lane
+    # never carries, there are at most 64 pawns of a color), then the multiplication adds the lanes into the top byte
+    lane_sums = squares.reshape(batch, -1).view(numpy.uint64).sum(axis=1, dtype=numpy.uint64)
+    counts = ((lane_sums * numpy.uint64(0x0101010101010101)) >> numpy.uint64(56)).astype(numpy.int32)
+    packed = numpy.packbits(squares.reshape(-1), bitorder="little")
+    return packed.view("<u%d" % word_bytes).reshape(batch, rows), counts
+
+
+def can_move(tensor, whose_turn):
+    """This function checks which boards of a frontier have a valid move for the side to move.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+
+    Returns:
+        A numpy bool array of shape (batch,).
+    """
+    if tensor.shape[2] > _MAX_PACKED_COLS:
+        return numpy.any([mask.any(axis=(1, 2)) for mask in move_kind_masks(tensor, whose_turn)], axis=0)
+    white_rows, number_of_white = row_bitmasks(tensor, WHITE)
+    black_rows, number_of_black = row_bitmasks(tensor, BLACK)
+    return _can_move_rows(white_rows, black_rows, whose_turn, tensor.shape[2])
+
+
+def _can_move_rows(white_rows, black_rows, whose_turn, cols):
+    """This function is can_move on the row bitmasks returned by row_bitmasks."""
+    full_row = white_rows.dtype.type((1 << cols) - 1)
+    if whose_turn == "w":
+        pawns, ahead_own, ahead_opponent = white_rows[:, :-1], white_rows[:, 1:], black_rows[:, 1:]
+    else:
+        pawns, ahead_own, ahead_opponent = black_rows[:, 1:], black_rows[:, :-1], white_rows[:, :-1]
+    # a pawn can move if the square ahead is empty or a square diagonally ahead holds an opponent pawn
+    targets = (~(ahead_own | ahead_opponent) & full_row) | ((ahead_opponent << 1) & full_row) | (ahead_opponent >> 1)
+    return (pawns & targets).any(axis=1)
+
+
+def static_board_evaluation(tensor, whose_turn, win_value):
+    """This function computes the heuristic value of every board of a frontier for the side to move.
+
+    It gives the same values as hexapawn_bitboard.static_board_evaluation, board by board. The rows are packed into
+    bitmasks first, so the rules are checked on a few words per board instead of every square.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+        win_value: The value of a won position, BoardGeometry.win_value.
+
+    Returns:
+        A numpy int32 array of the static board values and a numpy bool array that is True where the game is over.
+    """
+    if tensor.shape[2] > _MAX_PACKED_COLS:
+        cannot_move = ~can_move(tensor, whose_turn)
+        number_of_white = (tensor == WHITE).sum(axis=(1, 2), dtype=numpy.int32)
+        number_of_black = (tensor == BLACK).sum(axis=(1, 2), dtype=numpy.int32)
+        white_on_last_row = (tensor[:, -1, :] == WHITE).any(axis=1)
+        black_on_first_row = (tensor[:, 0, :] == BLACK).any(axis=1)
+    else:
+        white_rows, number_of_white = row_bitmasks(tensor, WHITE)
+        black_rows, number_of_black = row_bitmasks(tensor, BLACK)
+        cannot_move = ~_can_move_rows(white_rows, black_rows, whose_turn, tensor.shape[2])
+        white_on_last_row = white_rows[:, -1] != 0
+        black_on_first_row = black_rows[:, 0] != 0
+    if whose_turn == "w":
+        values = number_of_white - number_of_black
+        sign = 1  # +win_value when white has won
+    else:
+        values = number_of_black - number_of_white
+        sign = -1
+
+    # the rules are applied from the last checked to the first, so the first that holds sets the value
+    no_black = number_of_black == 0
+    no_white = number_of_white == 0
+    values[cannot_move] = -win_value
+    values[no_black] = sign * win_value
+    values[no_white] = -sign * win_value
+    values[white_on_last_row] = sign * win_value
+    values[black_on_first_row] = -sign * win_value
+    game_over = cannot_move | no_black | no_white | white_on_last_row | black_on_first_row
+    return values, game_over
+
+
+def expand(tensor, whose_turn, move_masks=None):
+    """This function plays every valid move of every board of a frontier.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+        move_masks: The legal_move_masks of the tensor, computed if not given.
+
+    Returns:
+        The next frontier, a numpy uint8 array, and for each of its boards the index of the board it came from. The
+        children of a board are contiguous and in hexapawn.move_generator order.
+    """
+    if move_masks is None:
+        move_masks = legal_move_masks(tensor, whose_turn)
+    # nonzero walks the masks in (board, row, column, move kind) order, which is the move generator order
+    parent_indices, from_rows, from_cols, move_kinds = numpy.nonzero(move_masks)
+    if whose_turn == "w":
+        own_code, to_rows = WHITE, from_rows + 1
+    else:
+        own_code, to_rows = BLACK, from_rows - 1
+    to_cols = from_cols + numpy.array([0, -1, 1])[move_kinds]
+
+    children = tensor[parent_indices]
+    child_indices = numpy.arange(len(children))
+    children[child_indices, from_rows, from_cols] = EMPTY
+    children[child_indices, to_rows, to_cols] = own_code
+    return children, parent_indices
+
+
+def negamax_values(tensor, whose_turn, depth, win_value, max_frontier=DEFAULT_MAX_FRONTIER):
+    """This function computes the minimax value of every board of a frontier, breadth-first.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+        depth: The number of moves left to look ahead.
+        win_value: The value of a won position, BoardGeometry.win_value.
+        max_frontier: The number of boards expanded at a time.
+
+    Returns:
+        A numpy int32 array of the values for the side to move, the same values a fixed-depth minimax gives.
+    """
+    values, game_over = static_board_evaluation(tensor, whose_turn, win_value)
+    if depth == 0 or game_over.all():
+        return values
+
+    next_turn = "b" if whose_turn == "w" else "w"
+    searched_boards = numpy.flatnonzero(~game_over)
+    for start in range(0, len(searched_boards), max_frontier):
+        chunk = searched_boards[start:start + max_frontier]
+        children, parent_indices = expand(tensor[chunk], whose_turn)
+        child_values = -negamax_values(children, next_turn, depth - 1, win_value, max_frontier)
+        # every board that is not over has a move, so each parent starts a segment of its children
+        segment_starts = numpy.flatnonzero(numpy.r_[True, parent_indices[1:] != parent_indices[:-1]])
+        values[chunk] = numpy.maximum.reduceat(child_values, segment_starts)
+    return values
+
+
+def count_leaves(tensor, whose_turn, depth, max_frontier=DEFAULT_MAX_FRONTIER):
+    """This function counts the perft leaves and the moves generated below every board of a frontier.
+
+    Args:
+        tensor: A numpy uint8 array of shape (batch, rows, cols).
+        whose_turn: A character indicates which side to move on every board.
+        depth: The number of moves left to look ahead.
+        max_frontier: The number of boards expanded at a time.
+
+    Returns:
+        The total number of leaves and of moves generated, as in hexapawn_perft.
+    """
+    if depth == 0:
+        return len(tensor), 0
+    values, game_over = static_board_evaluation(tensor, whose_turn, 1)
+    leaf_count, move_count = int(game_over.sum()), 0
+
+    next_turn = "b" if whose_turn == "w" else "w"
+    searched_boards = numpy.flatnonzero(~game_over)
+    for start in range(0, len(searched_boards), max_frontier):
+        chunk = searched_boards[start:start + max_frontier]
+        children, parent_indices = expand(tensor[chunk], whose_turn)
+        child_leaves, child_moves = count_leaves(children, next_turn, depth - 1, max_frontier)
+        leaf_count += child_leaves
+        move_count += len(children) + child_moves
+    return leaf_count, move_count
+
+
+def vectorized_algorithm(cur_board, board_size, pawn_color, number_moves_ahead, max_frontier=DEFAULT_MAX_FRONTIER):
+    """This function runs the breadth-first NumPy search behind the list of strings interface.
+
+    Args:
+        cur_board: The initial node(root).
+        board_size: The size of a square board, or a (rows, columns) pair.
+        pawn_color: The color indicates whose turn to move the pawn.
+        number_moves_ahead: The number indicates how many moves to look ahead.
+        max_frontier: The number of boards expanded at a time, which bounds the memory used.
+
+    Returns: A list of string representing the next best move for the current player, the same one
+        hexapawn.minimax_algorithm returns.
+
+    Raises:
+        ImportError: NumPy is not installed.
+    """
+    if number_moves_ahead == 0:
+        return []
+
+    win_value = hexapawn_bitboard.get_geometry(board_size).win_value
+    root = boards_to_tensor([cur_board], board_size)
+    values, game_over = static_board_evaluation(root, pawn_color, win_value)
+    if game_over[0]:  # one side has already won
+        return cur_board
+
+    children, parent_indices = expand(root, pawn_color)
+    next_turn = "b" if pawn_color == "w" else "w"
+    child_values = -negamax_values(children, next_turn, number_moves_ahead - 1, win_value, max_frontier)
+    # argmax picks the first of the best moves, like the strictly greater test of the minimax search
+    best_index = int(numpy.argmax(child_values))
+    return tensor_to_boards(children[best_index:best_index + 1])[0]